@@ -0,0 +1,103 @@
+""" memory per MediaEntry and time to refresh the GUI playlist model
+
+    python benchmarks/media_entry.py --entries 10000
+
+prints a json report, run it on different commits to compare """
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from os.path import dirname, join
+from types import SimpleNamespace
+
+from ovos_plugin_common_play import ocp
+from ovos_plugin_common_play.ocp.gui import OCPMediaPlayerGUI
+from ovos_plugin_common_play.ocp.media import MediaEntry, Playlist
+from ovos_plugin_common_play.ocp.status import PlaybackType
+from ovos_utils.messagebus import FakeBus
+
+
+def make_results(n):
+    return [{"title": f"track {i}",
+             "artist": f"artist {i % 100}",
+             "uri": f"https://example.com/media/{i}.mp3",
+             "skill_id": "skill-benchmark.openvoiceos",
+             "match_confidence": i % 100,
+             "playback": PlaybackType.AUDIO,
+             "length": 180000,
+             "album": f"album {i % 500}"} for i in range(n)]
+
+
+def measure_memory(results):
+    """ bytes per entry, after creation and after each serialization """
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    entries = [MediaEntry.from_dict(r) for r in results]
+    created = tracemalloc.get_traced_memory()[0]
+    for e in entries:
+        e.as_dict
+    serialized = tracemalloc.get_traced_memory()[0]
+    for e in entries:
+        e.info
+    with_info = tracemalloc.get_traced_memory()[0]
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    n = len(results)
+    return {"bytes_per_entry": round((created - base) / n, 1),
+            "bytes_per_entry_after_as_dict": round((serialized - base) / n, 1),
+            "bytes_per_entry_after_info": round((with_info - base) / n, 1),
+            "peak_bytes": peak - base}
+
+
+def measure_update_playlist(results, repeat):
+    """ time for gui.update_playlist while moving through the playlist,
+    messages are handled by an in process FakeBus """
+    playlist = Playlist(results)
+    player = SimpleNamespace(playlist=playlist,
+                             settings=SimpleNamespace(gui_page_size=50))
+    player.tracks = playlist.entries
+    bus = FakeBus()
+    sent = []
+    bus.on("message", sent.append)
+    gui = OCPMediaPlayerGUI()
+    gui.player = player
+    gui.set_bus(bus)
+    gui.update_playlist()
+    # session data is only synced once a page is shown
+    gui.show_page(join(dirname(ocp.__file__), "res", "ui", "Playlist.qml"))
+    sent.clear()
+
+    times = []
+    for i in range(repeat):
+        playlist.set_position(i % len(playlist))
+        start = time.perf_counter()
+        gui.update_playlist()
+        times.append(time.perf_counter() - start)
+    # what building the whole model used to cost, for reference
+    start = time.perf_counter()
+    [e.info for e in playlist.entries]
+    full_model = time.perf_counter() - start
+    times.sort()
+    return {"update_playlist_mean_ms": round(sum(times) / len(times) * 1000, 3),
+            "update_playlist_p95_ms": round(
+                times[int(0.95 * (len(times) - 1))] * 1000, 3),
+            "update_playlist_bytes_sent": sum(len(m) for m in sent),
+            "full_model_ms": round(full_model * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=100)
+    args = parser.parse_args()
+    results = make_results(args.entries)
+    report = {"benchmark": "media_entry", "entries": args.entries}
+    report.update(measure_memory(results))
+    report.update(measure_update_playlist(results, args.repeat))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
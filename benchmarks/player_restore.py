@@ -0,0 +1,107 @@
+""" restore time of a saved player queue
+
+    python benchmarks/player_restore.py --entries 10000
+
+times PlayerJournal.load from a compacted snapshot and from a journal of
+queued tracks, and a full OCPMediaPlayer.restore_state, prints a json
+report """
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+from os.path import getsize
+
+# the player journal goes to a throw away folder
+_TMP = tempfile.mkdtemp(prefix="ocp_benchmark_")
+for _var in ("XDG_CONFIG_HOME", "XDG_DATA_HOME", "XDG_CACHE_HOME"):
+    os.environ[_var] = _TMP
+
+from ovos_plugin_common_play.ocp.journal import PlayerJournal
+from ovos_plugin_common_play.ocp.player import OCPMediaPlayer
+from ovos_plugin_common_play.ocp.settings import OCPSettings
+from ovos_plugin_common_play.ocp.status import LoopState, PlaybackType
+from ovos_utils.messagebus import FakeBus
+
+
+def make_tracks(n):
+    return [{"title": f"track {i}",
+             "artist": f"artist {i % 100}",
+             "uri": f"https://example.com/media/{i}.mp3",
+             "skill_id": "skill-benchmark.openvoiceos",
+             "match_confidence": i % 100,
+             "playback": PlaybackType.AUDIO,
+             "length": 180000} for i in range(n)]
+
+
+def make_state(tracks):
+    return {"playlist": tracks,
+            "playlist_position": len(tracks) // 2,
+            "search": tracks[:50],
+            "search_position": 0,
+            "now_playing": tracks[len(tracks) // 2],
+            "loop_state": LoopState.NONE,
+            "shuffle": False}
+
+
+def best_of(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return round(min(times) * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--batch", type=int, default=100,
+                        help="tracks per journal record")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    tracks = make_tracks(args.entries)
+    state = make_state(tracks)
+    report = {"benchmark": "player_restore", "entries": args.entries}
+
+    snapshot = PlayerJournal(name="snapshot", folder=_TMP)
+    report["compact_ms"] = best_of(lambda: snapshot.compact(state),
+                                   args.repeat)
+    report["snapshot_bytes"] = getsize(snapshot.snapshot_path)
+    report["load_snapshot_ms"] = best_of(snapshot.load, args.repeat)
+
+    journal = PlayerJournal(name="journal", folder=_TMP,
+                            max_records=args.entries)
+    start = time.perf_counter()
+    for i in range(0, len(tracks), args.batch):
+        journal.record("playlist.extend", tracks[i:i + args.batch])
+    report["record_ms"] = round((time.perf_counter() - start) * 1000, 3)
+    journal.close()
+    report["journal_bytes"] = getsize(journal.journal_path)
+    report["load_journal_ms"] = best_of(journal.load, args.repeat)
+
+    # restore_state rebuilds playlist, search results and GUI data,
+    # persist_state is off so bind does not restore on its own
+    settings = OCPSettings()
+    settings["persist_state"] = False
+    settings["stream_cache"] = False
+    player = OCPMediaPlayer(bus=FakeBus(), settings=settings)
+    player.journal = PlayerJournal(folder=_TMP)
+
+    def restore():
+        player.journal.compact(state)
+        start = time.perf_counter()
+        player.restore_state()
+        return time.perf_counter() - start
+
+    report["restore_state_ms"] = round(
+        min(restore() for _ in range(args.repeat)) * 1000, 3)
+    assert len(player.playlist) == args.entries
+    player.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+""" Playlist membership, goto_track and remove_entry on large playlists
+
+    python benchmarks/playlist_index.py --entries 10000
+
+linear_scan is the cost of looking an entry up by comparing uris one by
+one, for reference, prints a json report """
+import argparse
+import json
+import logging
+import random
+import time
+
+from ovos_plugin_common_play.ocp.media import MediaEntry, Playlist
+from ovos_plugin_common_play.ocp.status import PlaybackType
+
+
+def make_results(n, prefix="media"):
+    return [{"title": f"track {i}",
+             "uri": f"https://example.com/{prefix}/{i}.mp3",
+             "skill_id": "skill-benchmark.openvoiceos",
+             "match_confidence": i % 100,
+             "playback": PlaybackType.AUDIO} for i in range(n)]
+
+
+def timed(func, args):
+    """ mean microseconds per call """
+    start = time.perf_counter()
+    for a in args:
+        func(a)
+    return round((time.perf_counter() - start) / len(args) * 1e6, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--entries", type=int, default=10000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(args.seed)
+
+    results = make_results(args.entries)
+    # a few playlist entries with nested tracks
+    results += [{"title": f"playlist {i}",
+                 "playlist": make_results(10, prefix=f"nested/{i}")}
+                for i in range(10)]
+    start = time.perf_counter()
+    playlist = Playlist(results)
+    build = time.perf_counter() - start
+
+    # ingestion as done for search results, skip what is already there
+    start = time.perf_counter()
+    ingested = Playlist()
+    for r in results[:args.entries]:
+        if r not in ingested:
+            ingested.append(r)
+    ingest = time.perf_counter() - start
+
+    hits = [MediaEntry.from_dict(r)
+            for r in rng.sample(results[:args.entries], args.lookups)]
+    misses = [MediaEntry.from_dict(r)
+              for r in make_results(args.lookups, prefix="missing")]
+    nested = [r for i in range(10) for r in make_results(10, f"nested/{i}")]
+    entries = playlist.entries
+
+    def linear_scan(entry):
+        return any(e.uri == entry.uri for e in entries)
+
+    report = {
+        "benchmark": "playlist_index",
+        "entries": args.entries,
+        "build_ms": round(build * 1000, 3),
+        "ingest_ms": round(ingest * 1000, 3),
+        "contains_hit_us": timed(playlist.__contains__, hits),
+        "contains_miss_us": timed(playlist.__contains__, misses),
+        "contains_nested_us": timed(playlist.__contains__, nested),
+        "goto_track_us": timed(playlist.goto_track, hits),
+        "linear_scan_miss_us": timed(linear_scan, misses[:50])
+    }
+    # every removal shifts the positions after it
+    removed = hits[:100]
+    start = time.perf_counter()
+    for e in removed:
+        playlist.remove_entry(e)
+    report["remove_entry_us"] = round(
+        (time.perf_counter() - start) / len(removed) * 1e6, 3)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+""" time from search completion to result selection
+
+every search ends with SearchSession.finish (all skills answered, early
+stop or grace period), this measures how long OCPSearch.search takes to
+return after that, with the completion event and with the old 100 ms
+polling loop as a reference
+
+    python benchmarks/search_completion.py --runs 30 --skills 5
+
+prints a json report, selection_delay is the time between finish and
+search returning, time_to_selection is the total search duration """
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+
+# sets up a throw away XDG folder before importing the plugin
+from search_fanout import SimulatedSkill, percentiles
+
+from ovos_plugin_common_play.ocp import OCP
+from ovos_plugin_common_play.ocp import search
+from ovos_plugin_common_play.ocp.settings import OCPSettings
+from ovos_plugin_common_play.ocp.status import MediaType
+from ovos_utils.messagebus import FakeBus
+
+
+def polling_wait(self, timeout):
+    """ how OCPSearch.search used to wait for skills """
+    while self.searching and self.elapsed <= timeout:
+        time.sleep(0.1)
+    self.searching = False
+    self.end = self.elapsed
+    self.cancel_timers()
+
+
+def measure(ocp, runs, polling=False):
+    finished = {}
+    finish = search.SearchSession.finish
+    wait = search.SearchSession.wait
+
+    def timed_finish(session):
+        finished.setdefault(session.search_id, time.time())
+        finish(session)
+
+    search.SearchSession.finish = timed_finish
+    if polling:
+        search.SearchSession.wait = polling_wait
+    metrics = []
+
+    def handler(message):
+        metrics.append(message.data)
+
+    ocp.bus.on("ovos.common_play.search.metrics", handler)
+    delays = []
+    try:
+        for i in range(runs):
+            ocp.player.media.search(f"benchmark song {i}", MediaType.MUSIC)
+            end = time.time()
+            m = metrics[-1]
+            if m["search_id"] in finished:
+                delays.append(end - finished[m["search_id"]])
+    finally:
+        search.SearchSession.finish = finish
+        search.SearchSession.wait = wait
+        ocp.bus.remove("ovos.common_play.search.metrics", handler)
+    return {"selection_delay": percentiles(delays),
+            "time_to_selection": percentiles(
+                [m["time_to_selection"] for m in metrics]),
+            "timeouts": runs - len(delays)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--skills", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="median skill latency, seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(args.seed)
+    settings = OCPSettings()
+    settings["search_metrics"] = True
+    settings["query_cache"] = False
+    ocp = OCP(bus=FakeBus(), settings=settings)
+    skills = [SimulatedSkill(ocp.bus, f"skill-sim-{i}.benchmark",
+                             latency=(args.latency, args.latency_sigma),
+                             confidence=(30, 70),
+                             rng=random.Random(rng.random()))
+              for i in range(args.skills)]
+
+    report = {"benchmark": "search_completion",
+              "python": sys.version.split()[0],
+              "runs": args.runs,
+              "skills": args.skills,
+              "event": measure(ocp, args.runs),
+              "polling": measure(ocp, args.runs, polling=True)}
+    for skill in skills:
+        skill.cancel()
+    ocp.player.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+""" skill fan-out simulation of the search pipeline
+
+drives OCP.handle_play -> OCPSearch.search -> select_best -> play_media
+against an in process FakeBus, simulated OCP and old style CPS skills
+answer the queries with configurable latency, result count, confidence
+and failure profiles
+
+    python benchmarks/search_fanout.py --runs 50 --skills 8 --cps-skills 2
+    python benchmarks/search_fanout.py --profile skills.json \\
+        --settings '{"early_stop_thresh": 80, "min_timeout": 1}'
+
+a profile is a json list of skills, missing keys use the command line
+values, eg. [{"skill_id": "slow.skill", "latency": [2.0, 0.5],
+"results": 3, "confidence": [20, 60], "fail_rate": 0.1,
+"timeout_rate": 0.1, "old_style": false}]
+
+latency is a lognormal distribution, [median seconds, sigma], skills
+fail (answer without results) with fail_rate and never answer with
+timeout_rate
+
+prints a json report, time to selection and time to play percentiles,
+bus messages per search and peak memory, run it on different commits
+or with different settings to compare, replies_per_search only counts
+ovos.common_play skills, old style CPS answers are merged afterwards """
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+# learned stats, journal and settings go to a throw away folder
+_TMP = tempfile.mkdtemp(prefix="ocp_benchmark_")
+for _var in ("XDG_CONFIG_HOME", "XDG_DATA_HOME", "XDG_CACHE_HOME"):
+    os.environ[_var] = _TMP
+
+from ovos_plugin_common_play.ocp import OCP
+from ovos_plugin_common_play.ocp.settings import OCPSettings
+from ovos_plugin_common_play.ocp.status import MediaType, PlaybackType
+from ovos_utils.messagebus import FakeBus, Message
+
+
+class SimulatedSkill:
+    """ answers ovos.common_play queries like an ovos_workshop skill """
+
+    def __init__(self, bus, skill_id, latency=(0.3, 0.5), results=5,
+                 confidence=(40, 90), fail_rate=0.0, timeout_rate=0.0,
+                 overlap=0.0, rng=None):
+        self.bus = bus
+        self.skill_id = skill_id
+        self.latency = latency
+        self.results = results
+        self.confidence = confidence
+        self.fail_rate = fail_rate
+        self.timeout_rate = timeout_rate
+        self.overlap = overlap  # ratio of results other skills also have
+        self.rng = rng or random.Random()
+        self.timers = []
+        bus.on("ovos.common_play.query", self.handle_query)
+        bus.on(f"ovos.common_play.query.{skill_id}", self.handle_query)
+
+    def sample_latency(self):
+        median, sigma = self.latency
+        return self.rng.lognormvariate(0, sigma) * median
+
+    def make_results(self, phrase):
+        results = []
+        for i in range(self.results):
+            if self.rng.random() < self.overlap:
+                uri = f"https://example.com/shared/{phrase}/{i}.mp3"
+            else:
+                uri = f"https://example.com/{self.skill_id}/{phrase}/{i}.mp3"
+            results.append({
+                "match_confidence": self.rng.randint(*self.confidence),
+                "media_type": MediaType.MUSIC,
+                "playback": PlaybackType.AUDIO,
+                "uri": uri,
+                "title": f"{phrase} {i}",
+                "artist": self.skill_id,
+                "skill_id": self.skill_id,
+                "length": 180000})
+        return results
+
+    def handle_query(self, message):
+        data = dict(message.data, skill_id=self.skill_id)
+        self.bus.emit(message.reply("ovos.common_play.skill.search_start",
+                                    data))
+        roll = self.rng.random()
+        if roll < self.timeout_rate:
+            return  # crashed mid search, never answers
+        failed = roll < self.timeout_rate + self.fail_rate
+        self.schedule(self.sample_latency(), self.answer, message, failed)
+
+    def answer(self, message, failed):
+        phrase = message.data["phrase"]
+        data = dict(message.data, skill_id=self.skill_id, searching=False,
+                    results=[] if failed else self.make_results(phrase))
+        self.bus.emit(message.reply("ovos.common_play.query.response", data))
+        self.bus.emit(message.reply("ovos.common_play.skill.search_end",
+                                    {"skill_id": self.skill_id,
+                                     "phrase": phrase,
+                                     "search_id": data.get("search_id")}))
+
+    def schedule(self, delay, func, *args):
+        timer = threading.Timer(delay, func, args)
+        timer.daemon = True
+        self.timers.append(timer)
+        timer.start()
+
+    def cancel(self):
+        for timer in self.timers:
+            timer.cancel()
+        self.timers = []
+
+
+class SimulatedCPSSkill(SimulatedSkill):
+    """ answers play:query like a mycroft common play skill """
+
+    def __init__(self, bus, skill_id, **kwargs):
+        super().__init__(bus, skill_id, **kwargs)
+        bus.ee.remove_listener("ovos.common_play.query", self.handle_query)
+        bus.ee.remove_listener(f"ovos.common_play.query.{skill_id}",
+                               self.handle_query)
+        bus.on("play:query", self.handle_query)
+
+    def handle_query(self, message):
+        phrase = message.data["phrase"]
+        self.bus.emit(Message("play:query.response",
+                              {"phrase": phrase, "skill_id": self.skill_id,
+                               "searching": True}))
+        roll = self.rng.random()
+        if roll < self.timeout_rate:
+            return
+        failed = roll < self.timeout_rate + self.fail_rate
+        self.schedule(self.sample_latency(), self.answer, message, failed)
+
+    def answer(self, message, failed):
+        phrase = message.data["phrase"]
+        self.bus.emit(Message("play:query.response",
+                              {"phrase": phrase, "skill_id": self.skill_id,
+                               "searching": False}))
+        if failed:
+            return
+        res = self.make_results(phrase)[0]
+        self.bus.emit(Message("play:query.response", {
+            "phrase": phrase,
+            "skill_id": self.skill_id,
+            "conf": res["match_confidence"] / 100,
+            "callback_data": {"stream": res["uri"], "title": res["title"]},
+            "searching": False}))
+
+
+def percentiles(values):
+    if not values:
+        return None
+    values = sorted(values)
+
+    def pct(p):
+        return round(values[min(len(values) - 1,
+                                 int(round(p / 100 * (len(values) - 1))))], 4)
+
+    return {"p50": pct(50), "p90": pct(90), "p95": pct(95), "p99": pct(99),
+            "mean": round(sum(values) / len(values), 4),
+            "max": round(values[-1], 4)}
+
+
+def load_profiles(args):
+    defaults = {"latency": [args.latency, args.latency_sigma],
+                "results": args.results,
+                "confidence": [args.min_conf, args.max_conf],
+                "fail_rate": args.fail_rate,
+                "timeout_rate": args.timeout_rate,
+                "overlap": args.overlap,
+                "old_style": False}
+    if args.profile:
+        with open(args.profile) as f:
+            profiles = json.load(f)
+    else:
+        profiles = [{"skill_id": f"skill-sim-{i}.benchmark"}
+                    for i in range(args.skills)]
+        profiles += [{"skill_id": f"skill-cps-{i}.benchmark",
+                      "old_style": True} for i in range(args.cps_skills)]
+    return [dict(defaults, **p) for p in profiles]
+
+
+def create_skills(bus, profiles, rng):
+    skills = []
+    for p in profiles:
+        cls = SimulatedCPSSkill if p["old_style"] else SimulatedSkill
+        skills.append(cls(bus, p["skill_id"], latency=tuple(p["latency"]),
+                          results=p["results"],
+                          confidence=tuple(p["confidence"]),
+                          fail_rate=p["fail_rate"],
+                          timeout_rate=p["timeout_rate"],
+                          overlap=p["overlap"],
+                          rng=random.Random(rng.random())))
+    return skills
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--memory-runs", type=int, default=3,
+                        help="extra runs traced for peak memory")
+    parser.add_argument("--skills", type=int, default=8)
+    parser.add_argument("--cps-skills", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.3,
+                        help="median skill latency, seconds")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--results", type=int, default=5)
+    parser.add_argument("--min-conf", type=int, default=30)
+    parser.add_argument("--max-conf", type=int, default=85)
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    parser.add_argument("--timeout-rate", type=float, default=0.02)
+    parser.add_argument("--overlap", type=float, default=0.2)
+    parser.add_argument("--profile", help="json file with skill profiles")
+    parser.add_argument("--settings", default="{}",
+                        help="json dict of OCPSettings overrides")
+    parser.add_argument("--gap", type=float, default=0.0,
+                        help="seconds between searches")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="also write the report here")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    rng = random.Random(args.seed)
+    overrides = json.loads(args.settings)
+    settings = OCPSettings()
+    settings["search_metrics"] = True
+    for k, v in overrides.items():
+        settings[k] = v
+
+    bus = FakeBus()
+    n_messages = [0]
+    bus.on("message", lambda _: n_messages.__setitem__(0, n_messages[0] + 1))
+    search_metrics = []
+    play_metrics = []
+    bus.on("ovos.common_play.search.metrics",
+           lambda m: search_metrics.append(m.data))
+    bus.on("ovos.common_play.play.metrics",
+           lambda m: play_metrics.append(m.data))
+
+    ocp = OCP(bus=bus, settings=settings)
+    profiles = load_profiles(args)
+    skills = create_skills(bus, profiles, rng)
+
+    def run(i):
+        before = n_messages[0]
+        ocp.handle_play(Message("ovos.common_play.search",
+                                {"utterance": f"play benchmark song {i}"}))
+        return n_messages[0] - before
+
+    messages = []
+    wall = []
+    for i in range(args.runs):
+        start = time.perf_counter()
+        messages.append(run(i))
+        wall.append(time.perf_counter() - start)
+        time.sleep(args.gap)
+
+    peak = 0
+    for i in range(args.memory_runs):
+        tracemalloc.start()
+        run(args.runs + i)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+
+    for skill in skills:
+        skill.cancel()
+    ocp.player.shutdown()
+
+    timed = search_metrics[:args.runs]
+    report = {
+        "benchmark": "search_fanout",
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "skills": profiles,
+        "settings": overrides,
+        "time_to_first_result": percentiles(
+            [m["time_to_first_result"] for m in timed
+             if m.get("time_to_first_result") is not None]),
+        "time_to_selection": percentiles(
+            [m["time_to_selection"] for m in timed
+             if m.get("time_to_selection") is not None]),
+        "time_to_play": percentiles(
+            [m["time_to_play"] for m in play_metrics[:args.runs]]),
+        "handle_play_wall_time": percentiles(wall),
+        "messages_per_search": percentiles(messages),
+        "replies_per_search": percentiles([m["replies"] for m in timed]),
+        "searches_without_results": sum(1 for m in play_metrics[:args.runs]
+                                        if not m["results"]),
+        "speculative_plays": sum(1 for m in play_metrics[:args.runs]
+                                 if m.get("speculative")),
+        "peak_memory_bytes": peak
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
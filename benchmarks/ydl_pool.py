@@ -0,0 +1,85 @@
+""" cold vs pooled youtube-dl extraction
+
+serves a small audio file from a local http server and resolves it with
+get_ydl_stream, once creating a new YoutubeDL instance for every call
+and once reusing the instances kept by YDL_POOL, needs yt-dlp or
+youtube-dl installed, no internet access is needed
+
+    python benchmarks/ydl_pool.py --runs 20 --backend yt-dlp
+
+prints a json report """
+import argparse
+import json
+import logging
+import sys
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from os.path import join
+
+from ovos_plugin_common_play.ocp.stream_handlers.youtube import \
+    YDL_POOL, YdlBackend, get_ydl_stream
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve(folder):
+    handler = partial(QuietHandler, directory=folder)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def measure(url, backend, runs, pooled):
+    times = []
+    YDL_POOL.clear()
+    if pooled:
+        get_ydl_stream(url, backend=backend, fallback=False)  # warm up
+    for _ in range(runs):
+        if not pooled:
+            YDL_POOL.clear()
+        start = time.perf_counter()
+        get_ydl_stream(url, backend=backend, fallback=False)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return {"mean_ms": round(sum(times) / len(times) * 1000, 3),
+            "p50_ms": round(times[len(times) // 2] * 1000, 3),
+            "max_ms": round(times[-1] * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--backend", default=YdlBackend.YDLP.value,
+                        choices=[b.value for b in YdlBackend])
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+    backend = YdlBackend(args.backend)
+
+    folder = tempfile.mkdtemp(prefix="ocp_benchmark_")
+    with open(join(folder, "track.mp3"), "wb") as f:
+        # mpeg frame header followed by silence
+        f.write(b"\xff\xfb\x90\x64" + bytes(4096))
+    server = serve(folder)
+    url = f"http://127.0.0.1:{server.server_port}/track.mp3"
+    try:
+        report = {"benchmark": "ydl_pool",
+                  "python": sys.version.split()[0],
+                  "backend": backend.value,
+                  "runs": args.runs,
+                  "cold": measure(url, backend, args.runs, pooled=False),
+                  "pooled": measure(url, backend, args.runs, pooled=True)}
+    finally:
+        server.shutdown()
+        YDL_POOL.clear()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
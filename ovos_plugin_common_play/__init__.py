@@ -31,8 +31,8 @@ class OCPAudioBackend(AudioBackend):
         config["backwards_compatibility"] = True
         config["search_fallback"] = True
         config["auto_play"] = True
-        config["max_timeout"] = 15
-        config["min_timeout"] = 8
+        config.setdefault("max_timeout", 15)
+        config.setdefault("min_timeout", 8)
         config["min_score"] = 30
 
         ocp_settings = OCPSettings()
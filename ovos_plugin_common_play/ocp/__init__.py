@@ -5,11 +5,12 @@ from ovos_plugin_common_play.ocp.gui import OCPMediaPlayerGUI
 from ovos_plugin_common_play.ocp.player import OCPMediaPlayer
 from ovos_plugin_common_play.ocp.settings import OCPSettings
 from ovos_plugin_common_play.ocp.status import *
-from ovos_utils.gui import can_use_gui
+from ovos_utils import create_daemon
 from ovos_utils.log import LOG
 from ovos_utils.messagebus import Message
 from ovos_workshop import OVOSAbstractApplication
 from padacioso import IntentContainer
+from threading import Lock
 import time
 
 
@@ -49,6 +50,17 @@ class OCP(OVOSAbstractApplication):
 
         self.add_event("ovos.common_play.ping", self.handle_ping)
 
+        # speculative playback, track started before the search ended
+        self._speculative_lock = Lock()
+        self._speculative_search = False
+        self._speculative_track = None
+        self._speculative_start = 0
+        self._speculative_played = None  # when audio started, if it did
+        # resolving the stream is slow, it happens outside
+        # _speculative_lock, this lock only keeps the play calls in order
+        self._speculative_play_lock = Lock()
+        self._speculative_generation = 0  # bumped by every track switch
+
         self.media_intents = IntentContainer()
         self.register_media_intents()
 
@@ -197,6 +209,7 @@ class OCP(OVOSAbstractApplication):
                 self.handle_play(message)
 
     def handle_play(self, message):
+        start = time.time()
         utterance = message.data["utterance"]
         phrase = message.data.get("query", "") or utterance
         num = message.data.get("number", "")
@@ -221,16 +234,41 @@ class OCP(OVOSAbstractApplication):
         # search common play skills
         results = self._search(phrase, utterance, media_type)
         self._do_play(phrase, results, media_type)
+        self._report_metrics(phrase, media_type, start, results)
 
     # "read XXX" - non "play XXX" audio book intent
     def handle_read(self, message):
+        start = time.time()
         utterance = message.data["utterance"]
         phrase = message.data.get("query", "") or utterance
         # search common play skills
         results = self._search(phrase, utterance, MediaType.AUDIOBOOK)
         self._do_play(phrase, results, MediaType.AUDIOBOOK)
+        self._report_metrics(phrase, MediaType.AUDIOBOOK, start, results)
 
     def _do_play(self, phrase, results, media_type=MediaType.GENERIC):
+        with self._speculative_lock:
+            self._speculative_search = False
+            track = self._speculative_track
+            self._speculative_track = None
+        if track is not None and results:
+            # playback already started, only switch to a better result
+            # if it is still early enough, otherwise just update the
+            # disambiguation list
+            best = self.player.media.select_best(results)
+            with self._speculative_lock:
+                switch = best and self._should_switch(track, best)
+                if switch:
+                    # a speculative play still resolving is superseded
+                    self._speculative_generation += 1
+            if switch:
+                LOG.info("Better result found, switching track")
+                with self._speculative_play_lock:
+                    self.player.play_media(best, results)
+            else:
+                self.player.media.set_results(results)
+            return
+
         self.player.reset()
 
         if not results:
@@ -251,6 +289,63 @@ class OCP(OVOSAbstractApplication):
         except:
             pass
 
+    def _report_metrics(self, phrase, media_type, start, results):
+        # speculative playback may have started the audio mid search
+        played = self._speculative_played
+        metrics = {"phrase": phrase,
+                   "media_type": media_type,
+                   "results": len(results),
+                   "speculative": played is not None,
+                   "time_to_play": (played or time.time()) - start}
+        LOG.debug(f"OVOSCommonPlay play metrics: {metrics}")
+        if self.settings.search_metrics:
+            self.bus.emit(Message("ovos.common_play.play.metrics", metrics))
+
+    # speculative playback
+    def _handle_speculative_results(self, replies, audio_only=False,
+                                    video_only=False):
+        results = self._filter_results(replies, audio_only, video_only)
+        if results:
+            create_daemon(self._speculative_play, (results,))
+
+    def _speculative_play(self, results):
+        best = self.player.media.select_best(results)
+        if not best:
+            return
+        with self._speculative_lock:
+            if not self._speculative_search:
+                return  # search already finished
+            track = self._speculative_track
+            if track is None:
+                LOG.info(f"Speculative playback: {best['title']} "
+                         f"({best['match_confidence']})")
+                self._speculative_start = time.time()
+            elif not self._should_switch(track, best):
+                # late result, only shown in disambiguation list
+                self.gui.update_search_results()
+                return
+            else:
+                LOG.info("Better result found, switching track")
+            self._speculative_track = best
+            self._speculative_generation += 1
+            generation = self._speculative_generation
+        # handle_play must not wait for the stream to be resolved
+        with self._speculative_play_lock:
+            if generation != self._speculative_generation:
+                return  # a better track was picked meanwhile
+            self.player.playlist.clear()
+            self.player.play_media(best)
+            if self._speculative_played is None:
+                self._speculative_played = time.time()
+        self.enclosure.mouth_reset()
+        self.set_context("Playing")
+
+    def _should_switch(self, track, best):
+        return best["match_confidence"] > track["match_confidence"] and \
+               best.get("uri") != track.get("uri") and \
+               time.time() - self._speculative_start <= \
+               self.settings.speculative_switch_window
+
     # helper methods
     def _search(self, phrase, utterance, media_type):
         self.enclosure.mouth_think()
@@ -268,12 +363,30 @@ class OCP(OVOSAbstractApplication):
             # dont include "video only" in search query
             phrase = self.remove_voc(phrase, "video_only")
 
+        callback = None
+        self._speculative_played = None
+        if self.settings.speculative_playback:
+            with self._speculative_lock:
+                self._speculative_search = True
+                self._speculative_track = None
+
+            def callback(replies):
+                self._handle_speculative_results(replies, audio_only,
+                                                 video_only)
+
         # Now we place a query on the messsagebus for anyone who wants to
         # attempt to service a 'play.request' message.
-        results = []
         phrase = phrase or utterance
-        for r in self.player.media.search(phrase, media_type=media_type):
+        replies = self.player.media.search(phrase, media_type=media_type,
+                                           callback=callback)
+        return self._filter_results(replies, audio_only, video_only)
+
+    def _filter_results(self, replies, audio_only=False, video_only=False):
+        results = []
+        for r in replies:
             results += r["results"]
+        # the same media offered by several skills is a single result
+        results = self.player.media.dedup_results(results)
 
         # ignore very low score matches
         results = [r for r in results
@@ -298,7 +411,7 @@ class OCP(OVOSAbstractApplication):
             results = [r for r in results
                        if r["playback"] == PlaybackType.VIDEO]
         # filter video results if GUI not connected
-        elif not can_use_gui(self.bus):
+        elif not self.gui.has_gui:
             LOG.info("unable to use GUI, filtering non-audio results")
             # filter video only streams
             results = [r for r in results
@@ -0,0 +1,176 @@
+import json
+import re
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from ovos_plugin_common_play.ocp.status import MediaType
+
+
+class TTLCache:
+    """ thread safe LRU cache, entries expire after their time to live and
+    the least recently used entries are evicted once the number of entries
+    or the (estimated) memory cap is exceeded """
+
+    def __init__(self, max_entries=100, max_bytes=0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes  # 0 -> no memory cap
+        self.n_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key: (value, size, expires_at)
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] <= time.time():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, ttl, size=0):
+        if ttl <= 0 or (self.max_bytes and size > self.max_bytes):
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (value, size, time.time() + ttl)
+            self.n_bytes += size
+            while len(self._entries) > self.max_entries or \
+                    (self.max_bytes and self.n_bytes > self.max_bytes):
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                return default
+            return self._drop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.n_bytes = 0
+
+    def _drop(self, key):
+        value, size, _ = self._entries.pop(key)
+        self.n_bytes -= size
+        return value
+
+    @property
+    def stats(self):
+        return {"entries": len(self),
+                "bytes": self.n_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions}
+
+    def __contains__(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[2] > time.time()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class QueryCache(TTLCache):
+    """ search results cache keyed by normalized phrase and media type
+
+    results younger than ttl are fresh, results older than that are still
+    returned until stale_ttl expires but are flagged as stale so the caller
+    can refresh them in the background (stale-while-revalidate) """
+
+    def __init__(self, ttl=60, stale_ttl=3600, max_entries=50,
+                 max_bytes=1024 * 1024):
+        super().__init__(max_entries=max_entries, max_bytes=max_bytes)
+        self.ttl = ttl
+        self.stale_ttl = max(stale_ttl, ttl)
+        self.stale_hits = 0
+
+    @staticmethod
+    def get_key(phrase, media_type=MediaType.GENERIC):
+        return " ".join(phrase.lower().split()), int(media_type)
+
+    def get_results(self, phrase, media_type=MediaType.GENERIC):
+        """ returns a tuple (results, is_stale), results is None on a miss"""
+        cached = self.get(self.get_key(phrase, media_type))
+        if cached is None:
+            return None, False
+        data, cached_at = cached
+        is_stale = time.time() - cached_at > self.ttl
+        if is_stale:
+            self.stale_hits += 1
+        # stored serialized, callers get their own copy to modify
+        return json.loads(data), is_stale
+
+    def cache_results(self, phrase, results, media_type=MediaType.GENERIC):
+        if not results:
+            return
+        data = json.dumps(results, default=str)
+        self.put(self.get_key(phrase, media_type), (data, time.time()),
+                 ttl=self.stale_ttl, size=len(data))
+
+    @property
+    def stats(self):
+        stats = super().stats
+        stats["stale_hits"] = self.stale_hits
+        return stats
+
+
+class StreamCache(TTLCache):
+    """ resolved streams keyed by source uri, extraction backend and
+    audio_only flag
+
+    signed urls (eg. youtube) are only cached until the expiry time encoded
+    in them, other streams use a per extractor default time to live """
+
+    default_ttls = {
+        "youtube//": 3600,
+        "ydl//": 3600,
+        "youtube.channel.live//": 600,
+        "bandcamp//": 3600,
+        "deezer//": 3600,
+        "rss//": 900,
+        "playlist": 3600  # .pls / .m3u
+    }
+
+    def __init__(self, max_entries=100, margin=60):
+        super().__init__(max_entries=max_entries)
+        self.margin = margin  # seconds before expiry to stop serving a url
+
+    @staticmethod
+    def get_key(uri, backend=None, audio_only=True):
+        return uri, str(backend), bool(audio_only)
+
+    @staticmethod
+    def get_expiry(url):
+        """ unix timestamp encoded in signed urls, eg.
+        ...googlevideo.com/videoplayback?expire=1650000000&...
+        ...googlevideo.com/api/manifest/hls_playlist/expire/1650000000/... """
+        match = re.search(r"[?&/]expires?[=/](\d{9,})", url or "")
+        if match:
+            return int(match.group(1))
+        return None
+
+    def get_ttl(self, meta, extractor=None):
+        expiry = self.get_expiry(meta.get("uri"))
+        if expiry is not None:
+            return expiry - time.time() - self.margin
+        return self.default_ttls.get(extractor, 0)
+
+    def get_stream(self, uri, backend=None, audio_only=True):
+        meta = self.get(self.get_key(uri, backend, audio_only))
+        return dict(meta) if meta else None
+
+    def cache_stream(self, uri, meta, extractor=None, backend=None,
+                     audio_only=True):
+        self.put(self.get_key(uri, backend, audio_only), dict(meta),
+                 ttl=self.get_ttl(meta, extractor))
@@ -0,0 +1,72 @@
+from threading import Lock
+
+from ovos_plugin_common_play.ocp.status import MediaType
+
+
+class SkillCapabilities:
+    """ maps skill_id to the MediaTypes it can answer
+
+    skills may declare their media types, any skill that returned results
+    for a media type in the past (SkillSearchStats) is also considered able
+    to answer it, skills that did neither are unknown and only reachable
+    by broadcasting the query """
+
+    def __init__(self, stats=None, min_samples=5):
+        self.stats = stats
+        self.min_samples = min_samples
+        self._declared = {}
+        self._skills = set()  # every skill seen announcing or answering
+        self._lock = Lock()
+
+    def seen(self, skill_id):
+        with self._lock:
+            self._skills.add(skill_id)
+
+    def declare(self, skill_id, media_types):
+        with self._lock:
+            self._declared[skill_id] = set(MediaType(m) for m in media_types)
+
+    def remove(self, skill_id):
+        with self._lock:
+            self._declared.pop(skill_id, None)
+            self._skills.discard(skill_id)
+
+    @property
+    def declared_skills(self):
+        return list(self._declared)
+
+    def get_media_types(self, skill_id):
+        media_types = set(self._declared.get(skill_id, []))
+        if self.stats:
+            media_types.update(m for m in MediaType
+                               if self.stats.hit_rate(skill_id, m) > 0)
+        return media_types
+
+    def get_learned_skills(self, media_type=MediaType.GENERIC):
+        if not self.stats:
+            return []
+        return [s for s in self.stats.get_skills(media_type)
+                if self.stats.hit_rate(s, media_type) > 0]
+
+    def _is_known(self, skill_id, media_type):
+        """ declared, or queried often enough to trust its hit rate """
+        if skill_id in self._declared:
+            return True
+        return bool(self.stats) and \
+            self.stats.queries(skill_id, media_type) >= self.min_samples
+
+    def get_targets(self, media_type=MediaType.GENERIC):
+        """ skill_ids that should receive a targeted query for media_type,
+        None if the query needs to be broadcast to every skill """
+        if media_type == MediaType.GENERIC:
+            return None
+        with self._lock:
+            if any(not self._is_known(s, media_type) for s in self._skills):
+                # unknown skills need the broadcast, otherwise they would
+                # never get a chance to answer and be learned
+                return None
+            targets = set(s for s, m in self._declared.items()
+                          if media_type in m or MediaType.GENERIC in m)
+            targets.update(s for s in self.get_learned_skills(media_type)
+                           if s not in self._declared)
+        return sorted(targets) or None
@@ -1,8 +1,126 @@
+import time
+from difflib import SequenceMatcher
 from os.path import join, dirname
 
+from ovos_plugin_common_play.ocp.base import OCPAbstractComponent
 from ovos_plugin_common_play.ocp.status import *
-from ovos_utils.gui import GUIInterface
+from ovos_utils.gui import GUIInterface, is_gui_running
 from ovos_utils.log import LOG
+from ovos_utils.messagebus import Message
+
+
+class GUIPresence(OCPAbstractComponent):
+    """ cached GUI availability, kept up to date from bus events instead of
+    probing the bus every time it is needed """
+
+    def __init__(self, player=None, ttl=60):
+        self.ttl = ttl  # refresh in the background after this many seconds
+        self._local = False
+        self._connected = False
+        self._last_refresh = 0
+        super().__init__(player)
+
+    def bind(self, player):
+        self._player = player
+        self.add_event("mycroft.gui.connected", self.handle_gui_connected)
+        self.add_event("gui.status.request.response", self.handle_gui_status)
+        self.add_event("mycroft.gui.screen.close", self.handle_gui_changed)
+        self.refresh()
+
+    def shutdown(self):
+        self.remove_event("mycroft.gui.connected")
+        self.remove_event("gui.status.request.response")
+        self.remove_event("mycroft.gui.screen.close")
+
+    def refresh(self):
+        """ update cached values, remote GUI status arrives async """
+        self._last_refresh = time.time()
+        self._local = is_gui_running()
+        self.bus.emit(Message("gui.status.request"))
+
+    @property
+    def is_local(self):
+        """ a GUI app is running in this device """
+        if time.time() - self._last_refresh > self.ttl:
+            self.refresh()
+        return self._local
+
+    @property
+    def is_available(self):
+        """ a GUI is running locally or connected to the bus """
+        return self.is_local or self._connected
+
+    def handle_gui_connected(self, message):
+        self._connected = True
+
+    def handle_gui_status(self, message):
+        self._connected = message.data.get("connected", False)
+
+    def handle_gui_changed(self, message):
+        self.refresh()
+
+
+class GUIChangeTracker:
+    """ values last published to the GUI, computes what needs to be sent
+
+    list models ({"data": [...], ...}) are updated with splice operations
+    when only a few of their entries changed """
+
+    def __init__(self, max_changes=0.5):
+        # send the full model if more than this ratio of entries changed
+        self.max_changes = max_changes
+        self.published = {}
+
+    def reset(self):
+        self.published = {}
+
+    def publish(self, key, value):
+        self.published[key] = value
+
+    def diff(self, key, value):
+        """ returns None if the value is unchanged, a list of splices
+        if the model can be updated incrementally, else the value """
+        old = self.published.get(key)
+        if old == value:
+            return None
+        if self._is_model(old) and self._is_model(value) and \
+                old.keys() == value.keys():
+            splices = self._get_splices(old["data"], value["data"])
+            n_changes = sum(len(s["insert"]) + s["remove"] for s in splices)
+            if n_changes <= self.max_changes * len(value["data"]):
+                return splices
+        return value
+
+    @staticmethod
+    def _is_model(value):
+        return isinstance(value, dict) and \
+            isinstance(value.get("data"), list)
+
+    @staticmethod
+    def _get_splices(old, new):
+        """ splices turning old into new, in reverse order so they can
+        be applied one after the other """
+
+        def get_keys(entries):
+            return [(e.get("uri"), e.get("title")) if isinstance(e, dict)
+                    else e for e in entries]
+
+        splices = []
+        matcher = SequenceMatcher(None, get_keys(old), get_keys(new),
+                                  autojunk=False)
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            if tag != "equal":
+                splices.append({"start": i1, "remove": i2 - i1,
+                                "insert": new[j1:j2]})
+                continue
+            # same entries, some fields might have been updated
+            for i, j in zip(range(i1, i2), range(j1, j2)):
+                if old[i] != new[j]:
+                    splices.append({"start": i, "remove": 1,
+                                    "insert": [new[j]]})
+        # opcodes come in order, an insertion and an update can share the
+        # same start, reversing keeps the update before the insertion
+        return splices[::-1]
 
 
 class OCPMediaPlayerGUI(GUIInterface):
@@ -10,10 +128,15 @@ class OCPMediaPlayerGUI(GUIInterface):
         # the skill_id is chosen so the namespace matches the regular bus api
         # ie, the gui event "XXX" is sent in the bus as "ovos.common_play.XXX"
         super(OCPMediaPlayerGUI, self).__init__(skill_id="ovos.common_play")
+        self.presence = GUIPresence()
+        self._changes = GUIChangeTracker()
+        self._dirty = set()
+        self._keys = set()
 
     def bind(self, player):
         self.player = player
         super().set_bus(self.bus)
+        self.presence.bind(player)
         self.player.add_event("ovos.common_play.playback_time",
                               self.handle_sync_seekbar)
         self.player.add_event('ovos.common_play.playlist.play',
@@ -22,6 +145,16 @@ class OCPMediaPlayerGUI(GUIInterface):
                               self.handle_play_from_search)
         self.player.add_event('ovos.common_play.collection.play',
                               self.handle_play_from_collection)
+        self.player.add_event('ovos.common_play.playlist.page',
+                              self.handle_playlist_page)
+        self.player.add_event('ovos.common_play.search.page',
+                              self.handle_search_page)
+        self.player.add_event('mycroft.gui.connected',
+                              self.handle_gui_connected)
+
+    @property
+    def has_gui(self):
+        return self.presence.is_available
 
     @property
     def search_spinner_page(self):
@@ -54,8 +187,70 @@ class OCPMediaPlayerGUI(GUIInterface):
     def shutdown(self):
         self.bus.remove("ovos.common_play.playback_time",
                         self.handle_sync_seekbar)
+        self.presence.shutdown()
         super().shutdown()
 
+    # session data
+    def __setitem__(self, key, value):
+        self._dirty.add(key)
+        self._keys.add(key)
+        super().__setitem__(key, value)
+
+    def _sync_data(self):
+        """ only send the values that changed since last published """
+        if not self._dirty:
+            # nested value changed, untracked
+            self.sync_snapshot()
+            return
+        dirty, self._dirty = self._dirty, set()
+        data = {}
+        for key in dirty:
+            value = self.get(key)
+            change = self._changes.diff(key, value)
+            if change is None:
+                continue
+            if change is value:
+                data[key] = value
+            else:
+                # QML pages apply the splices to their copy of the model
+                previous = self._changes.published[key]
+                self.send_event(f"{self.skill_id}.{key}.splice",
+                                {"splices": change,
+                                 "previous_offset": previous.get("offset"),
+                                 "offset": value.get("offset"),
+                                 "total": value.get("total")})
+            self._changes.publish(key, value)
+        if data:
+            data["__from"] = self.skill_id
+            self.bus.emit(Message("gui.value.set", data))
+
+    def sync_snapshot(self):
+        """ send all session data, eg. when a GUI (re)connects """
+        self._dirty = set()
+        super()._sync_data()
+        self._snapshot_published()
+
+    def _snapshot_published(self):
+        self._changes.reset()
+        for key in self._keys:
+            self._changes.publish(key, self.get(key))
+
+    def show_pages(self, *args, **kwargs):
+        # all session data is sent along with the pages
+        self._dirty = set()
+        super().show_pages(*args, **kwargs)
+        self._snapshot_published()
+
+    def clear(self):
+        self._dirty = set()
+        self._keys = set()
+        self._changes.reset()
+        super().clear()
+
+    def handle_gui_connected(self, message):
+        if self.page:
+            self.sync_snapshot()
+
     # OCPMediaPlayer interface
     def update_seekbar_capabilities(self):
         self["canResume"] = True
@@ -89,13 +284,36 @@ class OCPMediaPlayerGUI(GUIInterface):
         self["position"] = self.player.now_playing.position
 
     def update_search_results(self):
-        self["searchModel"] = {
-            "data": [e.info for e in self.player.disambiguation]
-        }
+        self["searchModel"] = self._get_page(
+            self.player.disambiguation,
+            self.player.media.search_playlist.position)
+        # worse results not loaded yet, see OCPSearch.load_more
+        self["searchHasMore"] = self.player.media.has_more
 
     def update_playlist(self):
-        self["playlistModel"] = {
-            "data": [e.info for e in self.player.tracks]
+        self["playlistModel"] = self._get_page(
+            self.player.tracks, self.player.playlist.position)
+
+    def _get_page(self, entries, position=0, offset=None, count=None,
+                  end=None):
+        """ model with a window of entries, by default centered around the
+        current position, else starting at offset or ending right before
+        end, "offset" and "total" let the GUI request the pages next to
+        the ones it already has """
+        count = count or self.player.settings.gui_page_size
+        total = len(entries)
+        if end is not None:
+            end = max(0, min(end, total))
+            offset = max(0, end - count)
+            count = end - offset
+        elif offset is None:
+            offset = max(0, min(position - count // 2, total - count))
+        else:
+            offset = max(0, min(offset, total))
+        return {
+            "data": [e.info for e in entries[offset:offset + count]],
+            "offset": offset,
+            "total": total
         }
 
     def show_playback_error(self):
@@ -172,6 +390,26 @@ class OCPMediaPlayerGUI(GUIInterface):
         self.player.play_media(media, playlist=playlist,
                                disambiguation=collection)
 
+    def handle_playlist_page(self, message):
+        page = self._get_page(self.player.tracks,
+                              offset=message.data.get("offset"),
+                              count=message.data.get("count"),
+                              end=message.data.get("end"))
+        self._send_page("playlistModel", page, message)
+
+    def handle_search_page(self, message):
+        page = self._get_page(self.player.disambiguation,
+                              offset=message.data.get("offset"),
+                              count=message.data.get("count"),
+                              end=message.data.get("end"))
+        self._send_page("searchModel", page, message)
+
+    def _send_page(self, key, page, message):
+        """ pages are merged into the GUI copy of the model, the session
+        data window is left as is """
+        self.send_event(f"{self.skill_id}.{key}.page", page)
+        self.bus.emit(message.reply(f"{message.msg_type}.response", page))
+
     # audio_only service -> gui
     def handle_sync_seekbar(self, message):
         """ event sent by ovos audio_only backend plugins """
@@ -0,0 +1,133 @@
+import time
+from collections import OrderedDict
+from itertools import islice
+from threading import Lock, Timer
+
+from json_database import JsonStorageXDG
+from ovos_utils.log import LOG
+
+
+class PlayHistory:
+    """ play count, last played time and skill of each played uri
+
+    capped to max_entries, the least recently (lru) or least frequently
+    (lfu) played uri is evicted, data is persisted across restarts
+
+    entries are kept in last played order and bucketed by play count so
+    "recently played", "most played" and evictions never scan the store """
+
+    def __init__(self, name="ocp_play_history", max_entries=1000,
+                 policy="lru"):
+        self.max_entries = max_entries
+        self.policy = policy
+        self._entries = OrderedDict()  # uri -> record, last played last
+        self._counts = {}  # play count -> OrderedDict of uris
+        self._db = JsonStorageXDG(name, subfolder="OCP")
+        self._lock = Lock()
+        self._store_lock = Lock()
+        self._store_timer = None
+        for uri, record in self._db.get("history", []):
+            self._add(uri, record)
+        while len(self._entries) > self.max_entries:
+            self._evict()
+
+    def configure(self, max_entries=None, policy=None):
+        """ change the limits, already loaded entries are evicted now """
+        with self._lock:
+            self.max_entries = max_entries or self.max_entries
+            self.policy = policy or self.policy
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def _add(self, uri, record):
+        self._entries[uri] = record
+        self._counts.setdefault(record["count"], OrderedDict())[uri] = None
+
+    def _drop(self, uri):
+        record = self._entries.pop(uri)
+        bucket = self._counts[record["count"]]
+        bucket.pop(uri)
+        if not bucket:
+            self._counts.pop(record["count"])
+        return record
+
+    def _evict(self):
+        if self.policy == "lfu":
+            # oldest uri among the least played ones
+            uri = next(iter(self._counts[min(self._counts)]))
+        else:
+            uri = next(iter(self._entries))
+        self._drop(uri)
+
+    def record(self, uri, skill_id=None, title=None):
+        """ register a new play of uri """
+        if not uri:
+            return
+        with self._lock:
+            if uri in self._entries:
+                record = self._drop(uri)
+            else:
+                record = {"count": 0}
+            record["count"] += 1
+            record["last_played"] = time.time()
+            record["skill_id"] = skill_id or record.get("skill_id")
+            record["title"] = title or record.get("title")
+            self._add(uri, record)
+            while len(self._entries) > self.max_entries:
+                self._evict()
+
+    def store(self):
+        with self._lock:
+            if self._store_timer is not None:
+                self._store_timer.cancel()
+                self._store_timer = None
+            # records are updated in place, write a copy
+            history = [(uri, dict(record))
+                       for uri, record in self._entries.items()]
+        # plays are not blocked by the disk write
+        with self._store_lock:
+            self._db["history"] = history
+            try:
+                self._db.store()
+            except Exception as e:
+                LOG.error(f"failed to save play history: {e}")
+
+    def schedule_store(self, delay=30):
+        """ store in a background thread after delay seconds, plays in
+        between are saved together """
+        with self._lock:
+            if self._store_timer is not None:
+                return
+            self._store_timer = Timer(delay, self.store)
+            self._store_timer.daemon = True
+            self._store_timer.start()
+
+    def get(self, uri):
+        return self._entries.get(uri)
+
+    def play_count(self, uri):
+        record = self._entries.get(uri)
+        return record["count"] if record else 0
+
+    def recent(self, n=10):
+        """ last n played uris, most recent first """
+        with self._lock:
+            return [dict(self._entries[uri], uri=uri)
+                    for uri in islice(reversed(self._entries), n)]
+
+    def most_played(self, n=10):
+        """ n most played uris, ties sorted by most recent """
+        results = []
+        with self._lock:
+            for count in sorted(self._counts, reverse=True):
+                for uri in reversed(self._counts[count]):
+                    results.append(dict(self._entries[uri], uri=uri))
+                    if len(results) >= n:
+                        return results
+        return results
+
+    def __contains__(self, uri):
+        return uri in self._entries
+
+    def __len__(self):
+        return len(self._entries)
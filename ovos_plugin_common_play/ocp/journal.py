@@ -0,0 +1,108 @@
+import json
+import os
+from os.path import join, isfile
+from threading import Lock
+
+from ovos_utils.log import LOG
+from ovos_utils.xdg_utils import xdg_data_home
+
+
+class PlayerJournal:
+    """ player state persisted as a snapshot plus an append only journal
+
+    every change is appended to the journal as a single json line, once
+    the journal grows past max_records the full state is written to the
+    snapshot file and the journal is truncated (compaction)
+
+    records are (op, value) pairs, most ops replace a key of the state
+    dict, "playlist.extend" updates it incrementally """
+
+    def __init__(self, name="ocp_player_state", max_records=500,
+                 folder=None):
+        folder = folder or join(xdg_data_home(), "OCP")
+        os.makedirs(folder, exist_ok=True)
+        self.snapshot_path = join(folder, f"{name}.json")
+        self.journal_path = join(folder, f"{name}.journal")
+        self.max_records = max_records
+        self.n_records = 0
+        self._journal = None
+        self._lock = Lock()
+
+    @staticmethod
+    def _apply(state, op, value):
+        if op == "playlist.extend":
+            state.setdefault("playlist", []).extend(value)
+        else:
+            state[op] = value
+
+    def load(self):
+        """ last snapshot with the journal replayed on top """
+        state = {}
+        with self._lock:
+            if isfile(self.snapshot_path):
+                try:
+                    with open(self.snapshot_path) as f:
+                        state = json.load(f)
+                except Exception as e:
+                    LOG.error(f"failed to load player snapshot: {e}")
+            self.n_records = 0
+            if isfile(self.journal_path):
+                with open(self.journal_path) as f:
+                    for line in f:
+                        try:
+                            op, value = json.loads(line)
+                        except ValueError:
+                            # partially written record, eg. power loss
+                            continue
+                        self._apply(state, op, value)
+                        self.n_records += 1
+        return state
+
+    def record(self, op, value=None):
+        line = json.dumps([op, value], separators=(",", ":"), default=str)
+        with self._lock:
+            try:
+                if self._journal is None:
+                    self._journal = self._open_journal()
+                self._journal.write(line + "\n")
+                self._journal.flush()
+                self.n_records += 1
+            except Exception as e:
+                LOG.error(f"failed to write player journal: {e}")
+
+    def _open_journal(self):
+        journal = open(self.journal_path, "a+")
+        if journal.tell():
+            journal.seek(journal.tell() - 1)
+            if journal.read(1) != "\n":
+                # do not append to a partially written record
+                journal.write("\n")
+        return journal
+
+    @property
+    def needs_compaction(self):
+        return self.n_records >= self.max_records
+
+    def compact(self, state):
+        """ write the full state to the snapshot and truncate the journal """
+        tmp_path = self.snapshot_path + ".tmp"
+        with self._lock:
+            try:
+                # json.dump streams through the pure python encoder,
+                # dumps uses the C one and is several times faster
+                data = json.dumps(state, separators=(",", ":"), default=str)
+                with open(tmp_path, "w") as f:
+                    f.write(data)
+                os.replace(tmp_path, self.snapshot_path)
+                if self._journal is not None:
+                    self._journal.close()
+                self._journal = open(self.journal_path, "w")
+                self.n_records = 0
+            except Exception as e:
+                LOG.error(f"failed to compact player journal: {e}")
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
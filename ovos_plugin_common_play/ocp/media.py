@@ -1,16 +1,22 @@
+from ovos_plugin_common_play.ocp.shuffle import ShuffleOrder
 from ovos_plugin_common_play.ocp.status import *
 from ovos_plugin_common_play.ocp.stream_handlers import is_youtube, \
     get_deezer_audio_stream, get_rss_first_stream, \
     get_youtube_live_from_channel, find_mime, get_bandcamp_audio_stream, \
-    get_ydl_stream, get_youtube_stream, get_playlist_stream
-from ovos_utils.json_helper import merge_dict
+    get_ydl_stream, get_youtube_stream, get_playlist_stream, get_extractor, \
+    can_play
 from ovos_utils.log import LOG
 from ovos_utils.messagebus import Message
+from operator import attrgetter
 from os.path import join, dirname
 
 
-# TODO subclass from dict (?)
 class MediaEntry:
+    # playlists may hold thousands of entries, no per instance __dict__
+    __slots__ = ("match_confidence", "title", "uri", "artist", "skill_id",
+                 "status", "playback", "image", "position", "phrase",
+                 "length", "skill_icon", "bg_image", "data")
+
     def __init__(self, title="", uri="", skill_id="ovos.common_play",
                  image=None, match_confidence=0,
                  playback=PlaybackType.UNDEFINED,
@@ -43,6 +49,7 @@ class MediaEntry:
 
     @staticmethod
     def from_dict(data):
+        data = dict(data)  # do not modify the caller's dict
         if data.get("bg_image") and data["bg_image"].startswith("/"):
             data["bg_image"] = "file:/" + data["bg_image"]
         data["skill"] = data.get("skill_id") or "ovos.common_play"
@@ -61,18 +68,22 @@ class MediaEntry:
     @property
     def info(self):
         # media results / playlist QML data model
-        return merge_dict(self.as_dict, {
+        info = self.as_dict
+        info.update({
             "duration": self.length,
             "track": self.title,
             "image": self.image,
             "album": self.skill_id,
             "source": self.skill_icon
         })
+        return info
 
     @property
     def as_dict(self):
-        return {k: v for k, v in self.__dict__.items()
-                if not k.startswith("_")}
+        # built on demand, caching it per entry would more than double the
+        # memory used by large playlists (see benchmarks/media_entry.py)
+        # MediaEntry.__slots__, subclasses only add private attributes
+        return {k: getattr(self, k) for k in MediaEntry.__slots__}
 
     @property
     def mimetype(self):
@@ -80,11 +91,23 @@ class MediaEntry:
             return find_mime(self.uri)
 
     def __eq__(self, other):
+        if self is other:
+            return True
+        if isinstance(other, MediaEntry):
+            uri = other.uri
+        elif isinstance(other, dict):
+            uri = other.get("stream") or other.get("uri") or other.get("url")
+        else:
+            return NotImplemented
+        if self.uri or uri:
+            return self.uri == uri
+        # playlist entries without uri, dict comparison
         if isinstance(other, MediaEntry):
             other = other.as_dict
-        # dict compatison
         return other == self.as_dict
 
+    __hash__ = None
+
     def __repr__(self):
         return str(self.as_dict)
 
@@ -93,9 +116,128 @@ class MediaEntry:
 
 
 class Playlist(list):
+    """ list of MediaEntry, dicts are converted once on insertion """
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        super().__setitem__(slice(None), [self._normalize(e) for e in self])
         self._position = 0
+        self._entries = None  # cached read only view
+        self._shuffle = None  # ShuffleOrder, created when shuffling
+        # uri/title -> position, kept in sync on every change
+        self._uri_index = {}
+        self._nested_index = {}  # uris of tracks inside playlist entries
+        self._title_index = {}  # playlist entries without uri
+        self._reindex()
+
+    @staticmethod
+    def _normalize(entry):
+        if isinstance(entry, dict):
+            return MediaEntry.from_dict(entry)
+        return entry
+
+    # index
+    @staticmethod
+    def _get_keys(entry):
+        """ returns uri, title, nested playlist of an entry """
+        if isinstance(entry, MediaEntry):
+            return entry.uri, entry.title, entry.data.get("playlist")
+        if isinstance(entry, dict):
+            uri = entry.get("stream") or entry.get("uri") or entry.get("url")
+            return uri, entry.get("title") or uri, entry.get("playlist")
+        return None, None, None
+
+    def _index_entry(self, entry, idx):
+        uri, title, playlist = self._get_keys(entry)
+        if uri:
+            self._uri_index.setdefault(uri, idx)
+        elif playlist:
+            self._title_index.setdefault(title, idx)
+            for t in playlist:
+                if t.get("uri"):
+                    self._nested_index.setdefault(t["uri"], idx)
+
+    def _reindex(self):
+        self._entries = None
+        self._uri_index = {}
+        self._nested_index = {}
+        self._title_index = {}
+        for idx, e in enumerate(self):
+            self._index_entry(e, idx)
+
+    def index_of(self, entry):
+        """ position of a playlist entry (matched by uri), None if not
+        in playlist """
+        uri, title, _ = self._get_keys(entry)
+        if uri:
+            return self._uri_index.get(uri)
+        return self._title_index.get(title)
+
+    # list mutations
+    def append(self, entry):
+        entry = self._normalize(entry)
+        super().append(entry)
+        self._entries = None
+        self._index_entry(entry, len(self) - 1)
+        if self._shuffle:
+            self._shuffle.insert(len(self) - 1)
+
+    def extend(self, entries):
+        for e in entries:
+            self.append(e)
+
+    def insert(self, index, entry):
+        if index >= len(self):
+            self.append(entry)
+            return
+        position = index if index >= 0 else max(0, len(self) + index)
+        super().insert(index, self._normalize(entry))
+        self._reindex()
+        if self._shuffle:
+            self._shuffle.insert(position)
+
+    def pop(self, index=-1):
+        position = index % len(self) if len(self) else index
+        entry = super().pop(index)
+        self._reindex()
+        if self._shuffle:
+            self._shuffle.remove(position)
+        return entry
+
+    def remove(self, entry):
+        self.pop(super().index(entry))
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._reindex()
+        self._shuffle = None
+
+    def reverse(self):
+        super().reverse()
+        self._reindex()
+        self._shuffle = None
+
+    def __setitem__(self, key, value):
+        if isinstance(key, slice):
+            value = [self._normalize(e) for e in value]
+        else:
+            value = self._normalize(value)
+        super().__setitem__(key, value)
+        self._reindex()
+        if isinstance(key, slice):
+            self._shuffle = None
+
+    def __delitem__(self, key):
+        if isinstance(key, slice):
+            super().__delitem__(key)
+            self._reindex()
+            self._shuffle = None
+        else:
+            self.pop(key)
+
+    def __iadd__(self, entries):
+        self.extend(entries)
+        return self
 
     @property
     def position(self):
@@ -106,27 +248,23 @@ class Playlist(list):
 
     def clear(self) -> None:
         super(Playlist, self).clear()
+        self._reindex()
         self._position = 0
+        self._shuffle = None
 
     @property
     def entries(self):
-        entries = []
-        for e in self:
-            if isinstance(e, dict):
-                e = MediaEntry.from_dict(e)
-            if isinstance(e, MediaEntry):
-                entries.append(e)
-        return entries
+        if self._entries is None:
+            self._entries = tuple(e for e in self
+                                  if isinstance(e, MediaEntry))
+        return self._entries
 
     def sort_by_conf(self):
-        self.sort(key=lambda k: k.match_confidence \
-            if isinstance(k, MediaEntry) else \
-            k.get("match_confidence", 0), reverse=True)
+        self.sort(key=attrgetter("match_confidence"), reverse=True)
 
     def add_entry(self, entry, index=-1):
         assert isinstance(index, int)
-        if isinstance(entry, dict):
-            entry = MediaEntry.from_dict(entry)
+        entry = self._normalize(entry)
         assert isinstance(entry, MediaEntry)
         if index == -1:
             index = len(self)
@@ -140,15 +278,10 @@ class Playlist(list):
         if isinstance(entry, int):
             self.pop(entry)
             return
-        if isinstance(entry, dict):
-            entry = MediaEntry.from_dict(entry)
-        assert isinstance(entry, MediaEntry)
-        for idx, e in self.entries:
-            if e == entry:
-                self.pop(idx)
-                break
-        else:
+        idx = self.index_of(entry)
+        if idx is None:
             raise ValueError("entry not in playlist")
+        self.pop(idx)
 
     def replace(self, new_list):
         self.clear()
@@ -156,21 +289,13 @@ class Playlist(list):
             self.add_entry(e)
 
     def __contains__(self, item):
-        if isinstance(item, dict):
-            item = MediaEntry.from_dict(item)
-        if not isinstance(item, MediaEntry):
+        uri, title, _ = self._get_keys(item)
+        if uri:
+            return uri in self._uri_index or uri in self._nested_index
+        if title is None:
             return False
-        for e in self.entries:
-            if not e.uri and e.data.get("playlist"):
-                if e.title == item.title and not item.uri:
-                    return True
-                # track in playlist
-                for t in e.data["playlist"]:
-                    if t.get("uri") == item.uri:
-                        return True
-            elif e.uri == item.uri:
-                return True
-        return False
+        # playlist entry without uri
+        return title in self._title_index
 
     def _validate_position(self):
         if self.position >= len(self) or self.position < 0:
@@ -199,15 +324,10 @@ class Playlist(list):
             uri = track.uri
         else:
             uri = track.get("uri", "")
-        for idx, t in enumerate(self):
-            if isinstance(t, MediaEntry):
-                uri2 = t.uri
-            else:
-                uri2 = t.get("uri", "")
-            if uri == uri2:
-                self.set_position(idx)
-                LOG.debug(f"New playlist position: {self.position}")
-                return
+        idx = self._uri_index.get(uri)
+        if idx is not None:
+            self.set_position(idx)
+            LOG.debug(f"New playlist position: {self.position}")
 
     @property
     def current_track(self):
@@ -219,11 +339,142 @@ class Playlist(list):
     def next_track(self):
         self.set_position(self.position + 1)
 
+    # shuffle
+    def reset_shuffle(self):
+        self._shuffle = None
+
+    def _get_shuffle(self):
+        if self._shuffle is None:
+            self._shuffle = ShuffleOrder(len(self))
+            self._shuffle.start(self.position)
+        return self._shuffle
+
+    def shuffle_next(self, repeat=False):
+        """ move to the next track in shuffle order, returns False once all
+        tracks were played unless repeat is set """
+        shuffle = self._get_shuffle()
+        position = shuffle.next()
+        if position is None:
+            if not repeat or not len(self):
+                return False
+            shuffle.reset(len(self))
+            position = shuffle.next()
+        self.set_position(position)
+        return True
+
+    def shuffle_upcoming(self, n=1):
+        """ next n tracks in shuffle order """
+        return [self[p] for p in self._get_shuffle().upcoming(n)]
+
+    def shuffle_prev(self):
+        """ move to the previous track in shuffle order """
+        position = self._get_shuffle().prev()
+        if position is None:
+            return False
+        self.set_position(position)
+        return True
+
     def prev_track(self):
         self.set_position(self.position - 1)
 
 
+def get_stream_backend(uri, settings):
+    """ extractor and extraction backend a uri will be resolved with """
+    extractor = get_extractor(uri)
+    if extractor == "youtube.channel.live//":
+        return extractor, settings.yt_chlive_backend
+    if extractor == "bandcamp//":
+        return extractor, settings.bandcamp_backend
+    if extractor == "ydl//":
+        return extractor, settings.ydl_backend
+    if extractor == "youtube//" or is_youtube(uri):
+        return "youtube//", settings.youtube_backend
+    return extractor, None
+
+
+def resolve_stream(uri, settings, video=False, cache=None):
+    """ resolve a uri into a playable stream, returns a dict with the
+    new metadata for the media entry, at least a "uri"
+
+    if a StreamCache is given, resolved streams are reused until expired """
+    extractor, backend = get_stream_backend(uri, settings)
+    if extractor and not can_play(uri):
+        raise RuntimeError(f"stream handler not available: {extractor}")
+    if cache is not None:
+        meta = cache.get_stream(uri, backend, audio_only=not video)
+        if meta:
+            LOG.debug(f"using cached stream for: {uri}")
+            return meta
+
+    meta, stream = _extract_stream(uri, extractor, settings, video)
+    if meta and cache is not None:
+        if ".pls" in uri or ".m3u" in uri:
+            extractor = "playlist"
+        cache.cache_stream(uri, meta, extractor, backend,
+                           audio_only=not video)
+    return meta or {"uri": stream}
+
+
+def _extract_stream(uri, extractor, settings, video=False):
+    """ returns the extracted metadata (empty if nothing was extracted)
+    and the uri without extractor prefix """
+    meta = {}
+    if extractor == "youtube.channel.live//":
+        uri = uri.replace("youtube.channel.live//", "")
+        uri = get_youtube_live_from_channel(
+            uri, backend=settings.yt_chlive_backend,
+            hedge_delay=settings.yt_chlive_hedge_delay)["url"]
+        if not uri:
+            LOG.error("youtube channel live stream extraction failed!!!")
+        else:
+            uri = "youtube//" + uri
+            extractor = "youtube//"
+
+    if extractor == "rss//":
+        uri = uri.replace("rss//", "")
+        meta = get_rss_first_stream(uri)
+        if not meta:
+            LOG.error("RSS feed stream extraction failed!!!")
+    elif extractor == "bandcamp//":
+        uri = uri.replace("bandcamp//", "")
+        meta = get_bandcamp_audio_stream(
+            uri, backend=settings.bandcamp_backend,
+            ydl_backend=settings.ydl_backend,
+            hedge_delay=settings.bandcamp_hedge_delay)
+        if not meta:
+            LOG.error("bandcamp stream extraction failed!!!")
+    elif extractor == "deezer//":
+        uri = uri.replace("deezer//", "")
+        meta = get_deezer_audio_stream(uri)
+        if not meta:
+            LOG.error("deezer stream extraction failed!!!")
+        else:
+            LOG.debug(f"deezer cache: {meta['uri']}")
+    elif extractor == "ydl//":
+        # supports more than youtube!!!
+        uri = uri.replace("ydl//", "")
+        meta = get_ydl_stream(uri, backend=settings.ydl_backend)
+        if not meta:
+            LOG.error("ydl stream extraction failed!!!")
+    elif extractor == "youtube//" or is_youtube(uri):
+        uri = uri.replace("youtube//", "")
+        meta = get_youtube_stream(
+            uri, backend=settings.youtube_backend,
+            audio_only=not video, ydl_backend=settings.ydl_backend,
+            hedge_delay=settings.youtube_hedge_delay)
+        if not meta:
+            LOG.error("youtube stream extraction failed!!!")
+
+    # .pls and .m3u are not supported by gui player, parse the file
+    if ".pls" in uri or ".m3u" in uri:
+        meta = get_playlist_stream(uri)
+
+    return meta, uri
+
+
 class NowPlaying(MediaEntry):
+    __slots__ = ("_player",)
+
     @property
     def bus(self):
         return self._player.bus
@@ -258,64 +509,9 @@ class NowPlaying(MediaEntry):
                                "artist": self.artist}))
 
     def extract_stream(self):
-        uri = self.uri
-        if self.playback == PlaybackType.VIDEO:
-            video = True
-        else:
-            video = False
-        meta = {}
-        if uri.startswith("rss//"):
-            uri = uri.replace("rss//", "")
-            meta = get_rss_first_stream(uri)
-            if not meta:
-                LOG.error("RSS feed stream extraction failed!!!")
-
-        if uri.startswith("bandcamp//"):
-            uri = uri.replace("bandcamp//", "")
-            meta = get_bandcamp_audio_stream(
-                uri, backend=self._player.settings.bandcamp_backend,
-                ydl_backend=self._player.settings.ydl_backend)
-            if not meta:
-                LOG.error("bandcamp stream extraction failed!!!")
-
-        if uri.startswith("deezer//"):
-            uri = uri.replace("deezer//", "")
-            meta = get_deezer_audio_stream(uri)
-            if not meta:
-                LOG.error("deezer stream extraction failed!!!")
-            else:
-                LOG.debug(f"deezer cache: {meta['uri']}")
-
-        elif uri.startswith("youtube.channel.live//"):
-            uri = uri.replace("youtube.channel.live//", "")
-            uri = get_youtube_live_from_channel(
-                uri, backend=self._player.settings.yt_chlive_backend)["url"]
-            if not uri:
-                LOG.error("youtube channel live stream extraction failed!!!")
-            else:
-                uri = "youtube//" + uri
-
-        if uri.startswith("ydl//"):
-            # supports more than youtube!!!
-            uri = uri.replace("ydl//", "")
-            meta = get_ydl_stream(uri,
-                                  backend=self._player.settings.ydl_backend)
-            if not meta:
-                LOG.error("ydl stream extraction failed!!!")
-        elif uri.startswith("youtube//") or is_youtube(uri):
-            uri = uri.replace("youtube//", "")
-            meta = get_youtube_stream(
-                uri, backend=self._player.settings.youtube_backend,
-                audio_only=not video, ydl_backend=self._player.settings.ydl_backend)
-            if not meta:
-                LOG.error("youtube stream extraction failed!!!")
-
-        # .pls and .m3u are not supported by gui player, parse the file
-        if ".pls" in uri or ".m3u" in uri:
-            meta = get_playlist_stream(uri)
-
-        meta = meta or {"uri": uri}
-
+        video = self.playback == PlaybackType.VIDEO
+        meta = resolve_stream(self.uri, self._player.settings, video=video,
+                              cache=self._player.stream_cache)
         # update media entry with new data
         self.update(meta)
 
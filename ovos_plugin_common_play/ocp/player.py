@@ -1,13 +1,15 @@
 from os.path import join, dirname
 
-import random
-
+from ovos_plugin_common_play.ocp.cache import StreamCache
 from ovos_plugin_common_play.ocp.gui import OCPMediaPlayerGUI
+from ovos_plugin_common_play.ocp.history import PlayHistory
+from ovos_plugin_common_play.ocp.journal import PlayerJournal
 from ovos_plugin_common_play.ocp.media import Playlist, MediaEntry, NowPlaying
+from ovos_plugin_common_play.ocp.prefetch import StreamPrefetcher
 from ovos_plugin_common_play.ocp.search import OCPSearch
 from ovos_plugin_common_play.ocp.settings import OCPSettings
 from ovos_plugin_common_play.ocp.status import *
-from ovos_utils.gui import is_gui_connected, is_gui_running
+from ovos_plugin_common_play.ocp.stream_handlers.youtube import YDL_POOL
 from ovos_utils.log import LOG
 from ovos_utils.messagebus import Message
 from ovos_workshop import OVOSAbstractApplication
@@ -28,7 +30,11 @@ class OCPMediaPlayer(OVOSAbstractApplication):
         self.shuffle = False
         self.now_playing = NowPlaying()
         self.media = OCPSearch()
-        self.track_history = {}
+        self.history = PlayHistory()
+        self.stream_cache = None
+        self.prefetcher = StreamPrefetcher()
+        self.journal = None
+        self._persisted = {}  # last values written to the journal
         super().__init__("ovos_common_play", settings=settings, bus=bus,
                          gui=gui, resources_dir=resources_dir, lang=lang)
 
@@ -38,7 +44,19 @@ class OCPMediaPlayer(OVOSAbstractApplication):
         self.media.bind(self)
         self.gui.bind(self)
         self.mpris.bind(self)
+        self.history.configure(max_entries=self.settings.history_max_entries,
+                               policy=self.settings.history_policy)
+        if self.settings.stream_cache:
+            self.stream_cache = StreamCache(
+                max_entries=self.settings.stream_cache_max_entries)
+            if self.settings.prefetch:
+                self.prefetcher.workers = self.settings.prefetch_workers
+                self.prefetcher.bind(self)
         self.register_bus_handlers()
+        if self.settings.persist_state:
+            self.journal = PlayerJournal(
+                max_records=self.settings.state_compact_every)
+            self.restore_state()
 
     def register_bus_handlers(self):
         # audio ducking TODO improve to wait for end of speech ?
@@ -86,6 +104,10 @@ class OCPMediaPlayer(OVOSAbstractApplication):
                        self.handle_duck_request)
         self.add_event('ovos.common_play.unduck',
                        self.handle_unduck_request)
+        self.add_event('ovos.common_play.history.recent',
+                       self.handle_history_recent_request)
+        self.add_event('ovos.common_play.history.most_played',
+                       self.handle_history_most_played_request)
 
     @property
     def active_skill(self):
@@ -176,16 +198,103 @@ class OCPMediaPlayer(OVOSAbstractApplication):
         # update gui values
         self.gui.update_current_track()
         self.gui.update_playlist()
+        self.persist_state()
+
+    # persistence
+    @staticmethod
+    def _serialize(entry):
+        data = entry.as_dict
+        data.update(data.pop("data", None) or {})
+        return data
+
+    def _get_player_state(self):
+        """ state journaled as a whole on every change """
+        return {
+            "playlist_position": self.playlist.position,
+            "search_position": self.media.search_playlist.position,
+            "now_playing": self._serialize(self.now_playing),
+            "loop_state": self.loop_state,
+            "shuffle": self.shuffle
+        }
+
+    def get_state(self):
+        state = self._get_player_state()
+        state["playlist"] = [self._serialize(e) for e in self.tracks]
+        state["search"] = [self._serialize(e) for e in self.disambiguation]
+        return state
+
+    def persist_state(self):
+        """ journal whatever changed since last call """
+        if not self.journal:
+            return
+        last = self._persisted
+        tracks = self.tracks
+        old = last.get("playlist") or ()
+        if tracks is not old:
+            if old and len(tracks) > len(old) and \
+                    tracks[0] is old[0] and \
+                    tracks[len(old) - 1] is old[-1]:
+                # tracks were queued, only journal the new ones
+                self.journal.record("playlist.extend",
+                                    [self._serialize(e)
+                                     for e in tracks[len(old):]])
+            else:
+                self.journal.record("playlist",
+                                    [self._serialize(e) for e in tracks])
+            last["playlist"] = tracks
+        results = self.disambiguation
+        if results is not last.get("search"):
+            self.journal.record("search",
+                                [self._serialize(e) for e in results])
+            last["search"] = results
+        for key, value in self._get_player_state().items():
+            if last.get(key) != value:
+                self.journal.record(key, value)
+                last[key] = value
+        if self.journal.needs_compaction:
+            self.journal.compact(self.get_state())
+
+    def restore_state(self):
+        """ load the last saved queue, no skills are queried """
+        state = self.journal.load()
+        if not state:
+            return
+        LOG.info(f"Restoring OCP state: {len(state.get('playlist', []))} "
+                 f"tracks")
+        if state.get("search"):
+            self.media.set_results(state["search"])
+            self.media.search_playlist.set_position(
+                state.get("search_position", 0))
+        self.playlist.replace(state.get("playlist", []))
+        if self.playlist:
+            self.playlist.set_position(state.get("playlist_position", 0))
+            # the saved now_playing holds the resolved stream, often a
+            # signed url that expired meanwhile, the playlist entry has
+            # the original uri and is resolved again on play
+            self.now_playing.update(self.playlist[self.playlist.position])
+        elif state.get("now_playing"):
+            self.now_playing.update(state["now_playing"])
+        self.loop_state = state.get("loop_state", LoopState.NONE)
+        self.shuffle = state.get("shuffle", False)
+        # start a fresh journal from the restored state, nothing changed
+        # since the snapshot so nothing needs to be journaled
+        self.journal.compact(self.get_state())
+        self._persisted = self._get_player_state()
+        self._persisted["playlist"] = self.tracks
+        self._persisted["search"] = self.disambiguation
+        self.gui.update_playlist()
 
     # stream handling
     def validate_stream(self):
+        # the stream might be getting resolved in the background already
+        self.prefetcher.wait(self.now_playing.uri,
+                             self.now_playing.playback == PlaybackType.VIDEO)
         try:
             self.now_playing.extract_stream()
         except Exception as e:
             LOG.exception(e)
             return False
-        has_gui = is_gui_running() or is_gui_connected(self.bus)
-        if not has_gui or self.settings.force_audioservice:
+        if not self.gui.has_gui or self.settings.force_audioservice:
             # No gui, so lets force playback to use audio only
             self.now_playing.playback = PlaybackType.AUDIO_SERVICE
 
@@ -202,9 +311,8 @@ class OCPMediaPlayer(OVOSAbstractApplication):
         self.mpris.stop()
         self.pause()  # make it more responsive
         if disambiguation:
-            self.media.search_playlist.replace(disambiguation)
-            self.media.search_playlist.sort_by_conf()
-            self.gui.update_search_results()
+            self.media.set_results(disambiguation)
+            self.prefetcher.prefetch_results()
         if playlist:
             self.playlist.replace(playlist)
         if track in self.playlist:
@@ -216,13 +324,19 @@ class OCPMediaPlayer(OVOSAbstractApplication):
         # stop any external media players
         self.mpris.stop()
         self.gui.show_player()
+        # validate_stream replaces the uri with the resolved stream, signed
+        # urls change on every play, the history tracks the original
+        uri = self.now_playing.uri
         if not self.validate_stream():
             self.on_invalid_media()
             return
 
-        if self.now_playing.uri not in self.track_history:
-            self.track_history[self.now_playing.uri] = 0
-        self.track_history[self.now_playing.uri] += 1
+        self.history.record(uri,
+                            skill_id=self.now_playing.skill_id,
+                            title=self.now_playing.title)
+        # saved in the background, and on shutdown
+        self.history.schedule_store()
+        self.prefetcher.prefetch_upcoming()
 
         if self.active_backend in [PlaybackType.AUDIO,
                                    PlaybackType.AUDIO_SERVICE]:
@@ -233,7 +347,7 @@ class OCPMediaPlayer(OVOSAbstractApplication):
                 self.bus.emit(Message("ovos.common_play.track.state", {
                     "state": TrackState.PLAYING_AUDIOSERVICE}))
                 self.set_player_state(PlayerState.PLAYING)
-            elif is_gui_running():
+            elif self.gui.presence.is_local:
                 # handle audio natively in mycroft-gui
                 self.bus.emit(Message("gui.player.media.service.play", {
                     "track": self.now_playing.uri,
@@ -269,8 +383,8 @@ class OCPMediaPlayer(OVOSAbstractApplication):
 
     def play_shuffle(self):
         LOG.debug("Shuffle == True")
-        if len(self.playlist) > 1 and not self.playlist.is_last_track:
-            self.playlist.set_position(random.randint(0, len(self.playlist)))
+        if len(self.playlist) > 1 and self.playlist.shuffle_next(
+                repeat=self.loop_state == LoopState.REPEAT):
             self.set_now_playing(self.playlist.current_track)
         else:
             self.media.search_playlist.next_track()
@@ -313,7 +427,12 @@ class OCPMediaPlayer(OVOSAbstractApplication):
         self.pause()  # make more responsive
 
         if self.shuffle:
-            self.play_shuffle()
+            if self.playlist.shuffle_prev():
+                self.set_now_playing(self.playlist.current_track)
+                self.play()
+            else:
+                LOG.debug("requested previous, but already in 1st "
+                          "shuffled track")
         elif not self.playlist.is_first_track:
             self.playlist.prev_track()
             self.set_now_playing(self.playlist.current_track)
@@ -402,9 +521,17 @@ class OCPMediaPlayer(OVOSAbstractApplication):
         self.set_media_state(MediaState.NO_MEDIA)
         self.shuffle = False
         self.loop_state = LoopState.NONE
+        self.prefetcher.cancel("upcoming")
+        self.persist_state()
 
     def shutdown(self):
         self.stop()
+        self.prefetcher.shutdown()
+        YDL_POOL.clear()
+        self.history.store()
+        if self.journal:
+            self.journal.compact(self.get_state())
+            self.journal.close()
         self.mpris.shutdown()
         self.now_playing.shutdown()
         self.gui.shutdown()
@@ -493,11 +620,16 @@ class OCPMediaPlayer(OVOSAbstractApplication):
             self.loop_state = LoopState.REPEAT
         LOG.info(f"Repeat: {self.loop_state}")
         self.gui.update_seekbar_capabilities()
+        self.prefetcher.prefetch_upcoming()
+        self.persist_state()
 
     def handle_shuffle_toggle_request(self, message):
         self.shuffle = not self.shuffle
+        self.playlist.reset_shuffle()
         LOG.info(f"Shuffle: {self.shuffle}")
         self.gui.update_seekbar_capabilities()
+        self.prefetcher.prefetch_upcoming()
+        self.persist_state()
 
     def handle_playlist_set_request(self, message):
         self.playlist.clear()
@@ -506,10 +638,27 @@ class OCPMediaPlayer(OVOSAbstractApplication):
     def handle_playlist_queue_request(self, message):
         for track in message.data["tracks"]:
             self.playlist.add_entry(track)
+        self.prefetcher.prefetch_upcoming()
+        self.persist_state()
 
     def handle_playlist_clear_request(self, message):
         self.playlist.clear()
         self.set_media_state(MediaState.NO_MEDIA)
+        self.prefetcher.cancel("upcoming")
+        self.persist_state()
+
+    # play history bus api
+    def handle_history_recent_request(self, message):
+        n = message.data.get("count", 10)
+        self.bus.emit(message.reply(
+            "ovos.common_play.history.recent.response",
+            {"history": self.history.recent(n)}))
+
+    def handle_history_most_played_request(self, message):
+        n = message.data.get("count", 10)
+        self.bus.emit(message.reply(
+            "ovos.common_play.history.most_played.response",
+            {"history": self.history.most_played(n)}))
 
     # audio ducking
     def handle_duck_request(self, message):
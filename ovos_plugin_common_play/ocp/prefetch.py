@@ -0,0 +1,128 @@
+from itertools import count
+from queue import PriorityQueue
+from threading import Event, Lock
+
+from ovos_plugin_common_play.ocp.base import OCPAbstractComponent
+from ovos_plugin_common_play.ocp.media import resolve_stream
+from ovos_plugin_common_play.ocp.status import *
+from ovos_utils import create_daemon
+from ovos_utils.log import LOG
+
+
+class StreamPrefetcher(OCPAbstractComponent):
+    """ resolves upcoming tracks in a pool of worker threads so the stream
+    cache is already warm when playback reaches them
+
+    requests are grouped, queuing a new batch for a group cancels whatever
+    is still pending from the previous batch of that group """
+
+    def __init__(self, player=None, workers=2):
+        self.workers = workers
+        self._queue = PriorityQueue()
+        self._counter = count()  # FIFO within the same priority
+        self._generations = {}  # group -> current batch
+        self._inflight = {}  # (uri, video) -> Event set once resolved
+        self._lock = Lock()
+        self._running = False
+        super().__init__(player)
+
+    def bind(self, player):
+        self._player = player
+        if not self._running:
+            self._running = True
+            for _ in range(self.workers):
+                create_daemon(self._worker)
+
+    def shutdown(self):
+        self._running = False
+        for _ in range(self.workers):
+            # sentinels sort after any real request
+            self._queue.put((float("inf"), next(self._counter),
+                             None, None, None, None))
+
+    def cancel(self, group):
+        """ drop pending requests of a group, in progress ones finish """
+        with self._lock:
+            self._generations[group] = self._generations.get(group, 0) + 1
+
+    def prefetch(self, entries, group, priority=0):
+        """ resolve entries in the background, lower priority goes first """
+        self.cancel(group)
+        if not self._running or self.player.stream_cache is None:
+            return
+        generation = self._generations[group]
+        for entry in entries:
+            if not entry.uri:
+                continue  # nested playlist
+            video = entry.playback == PlaybackType.VIDEO
+            self._queue.put((priority, next(self._counter), group,
+                             generation, entry.uri, video))
+
+    def wait(self, uri, video=False, timeout=5):
+        """ wait for the uri to be resolved if it is being prefetched now,
+        returns False if it timed out """
+        with self._lock:
+            event = self._inflight.get((uri, video))
+        if event is None:
+            return True
+        return event.wait(timeout)
+
+    def _worker(self):
+        while self._running:
+            _, _, group, generation, uri, video = self._queue.get()
+            if uri is None or generation != self._generations.get(group):
+                continue
+            with self._lock:
+                if (uri, video) in self._inflight:
+                    continue
+                event = self._inflight[(uri, video)] = Event()
+            try:
+                resolve_stream(uri, self.settings, video=video,
+                               cache=self.player.stream_cache)
+            except Exception as e:
+                LOG.debug(f"failed to prefetch {uri}: {e}")
+            finally:
+                with self._lock:
+                    self._inflight.pop((uri, video), None)
+                event.set()
+
+    # upcoming tracks
+    def get_upcoming(self, n=1):
+        """ next n tracks play_next will pick, following shuffle
+        and loop_state """
+        player = self.player
+        playlist = player.playlist
+        if player.loop_state == LoopState.REPEAT_TRACK:
+            return []  # current track, already resolved
+        if player.shuffle and len(playlist) > 1:
+            return playlist.shuffle_upcoming(n)
+        tracks = player.tracks
+        upcoming = list(tracks[playlist.position + 1:
+                               playlist.position + 1 + n])
+        if len(upcoming) < n and player.settings.merge_search:
+            results = player.disambiguation
+            position = player.media.search_playlist.position
+            for entry in results[position + 1:]:
+                if len(upcoming) >= n:
+                    break
+                if entry not in playlist:
+                    upcoming.append(entry)
+        if len(upcoming) < n and player.loop_state == LoopState.REPEAT:
+            upcoming += tracks[:min(n - len(upcoming), playlist.position)]
+        return upcoming
+
+    def prefetch_upcoming(self):
+        if not self._running:
+            return
+        n = self.settings.prefetch_tracks
+        self.prefetch(self.get_upcoming(n) if n else [], "upcoming")
+
+    # search results
+    def prefetch_results(self):
+        """ best search results, so picking another one from the
+        disambiguation page (or falling back to it) starts instantly,
+        queued after the upcoming tracks """
+        if not self._running:
+            return
+        n = self.settings.prefetch_search_results
+        self.prefetch(self.player.disambiguation[:n], "search", priority=1)
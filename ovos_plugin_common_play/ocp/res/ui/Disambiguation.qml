@@ -27,13 +27,97 @@ Mycroft.Delegate {
     id: delegate
 
     property var playlistModel: sessionData.searchModel
+    // local copy, full models come from sessionData, deltas and pages
+    // from gui events
+    property var listModel: playlistModel
+    // pages merged into listModel around the session data window
+    property bool pagesMerged: false
+    property bool pageRequested: false
+    property bool resetting: false
+    property bool moreRequested: false
     property Component emptyHighlighter: Item{}
     fillWidth: true
 
     skillBackgroundSource: sessionData.bg_image
     
     onPlaylistModelChanged: {
+        pagesMerged = false
+        moreRequested = false
+        setModel(playlistModel, 0)
+    }
+
+    // replace the local model keeping the view at index, the view jumps
+    // to its first item on model resets, that is not a page request
+    function setModel(model, index) {
+        resetting = true
+        listModel = model
         playlistListView.forceLayout()
+        playlistListView.currentIndex = Math.max(0, Math.min(index, model.data.length - 1))
+        playlistListView.positionViewAtIndex(playlistListView.currentIndex, ListView.Beginning)
+        resetting = false
+    }
+
+    function requestPage(page) {
+        if (!pageRequested && !resetting) {
+            pageRequested = true
+            triggerGuiEvent("search.page", page)
+        }
+    }
+
+    // every result was shown, load the worst ones the search kept aside
+    function requestMore() {
+        if (!moreRequested && !resetting && sessionData.searchHasMore) {
+            moreRequested = true
+            triggerGuiEvent("search.more", {})
+        }
+    }
+
+    function requestNext() {
+        if (listModel.offset + listModel.data.length < listModel.total) {
+            requestPage({"offset": listModel.offset + listModel.data.length})
+        } else {
+            requestMore()
+        }
+    }
+
+    onGuiEvent: {
+        if (eventName == "ovos.common_play.searchModel.splice") {
+            // splices are relative to the session data window, it sits
+            // somewhere inside the merged pages
+            var shift = data.previous_offset - listModel.offset
+            var moved = data.offset != data.previous_offset
+            if ((pagesMerged && moved) || shift < 0 || shift > listModel.data.length) {
+                // merged pages are stale, start over from the new window
+                pagesMerged = false
+                setModel({"data": [], "offset": data.offset, "total": data.total}, 0)
+                requestPage({"offset": data.offset})
+                return
+            }
+            var entries = listModel.data.slice()
+            for (var i = 0; i < data.splices.length; i++) {
+                var splice = data.splices[i]
+                Array.prototype.splice.apply(entries, [splice.start + shift, splice.remove].concat(splice.insert))
+            }
+            setModel({"data": entries, "offset": moved ? data.offset : listModel.offset, "total": data.total}, playlistListView.currentIndex)
+            if (moreRequested) {
+                // loaded results might be past the local model
+                moreRequested = false
+                if (playlistListView.atYEnd) {
+                    requestNext()
+                }
+            }
+        } else if (eventName == "ovos.common_play.searchModel.page") {
+            var index = playlistListView.currentIndex
+            if (data.offset == listModel.offset + listModel.data.length) {
+                setModel({"data": listModel.data.concat(data.data), "offset": listModel.offset, "total": data.total}, index)
+            } else if (data.offset + data.data.length == listModel.offset) {
+                setModel({"data": data.data.concat(listModel.data), "offset": data.offset, "total": data.total}, index + data.data.length)
+            } else {
+                setModel(data, 0)
+            }
+            pagesMerged = true
+            pageRequested = false
+        }
     }
 
     Keys.onBackPressed: {
@@ -68,7 +152,7 @@ Mycroft.Delegate {
         ListView {
             id: playlistListView
             keyNavigationEnabled: true
-            model: playlistModel.data
+            model: listModel.data
             focus: false
             interactive: true
             bottomMargin: delegate.controlBarItem.height + Kirigami.Units.largeSpacing
@@ -79,6 +163,19 @@ Mycroft.Delegate {
             clip: true
             highlightRangeMode: ListView.StrictlyEnforceRange
             snapMode: ListView.SnapToItem
+
+            // only a window of the entries is sent, request the pages
+            // next to it, they are merged into the local model
+            onAtYEndChanged: {
+                if (atYEnd) {
+                    requestNext()
+                }
+            }
+            onAtYBeginningChanged: {
+                if (atYBeginning && listModel.offset > 0) {
+                    requestPage({"end": listModel.offset})
+                }
+            }
             
             delegate: Controls.ItemDelegate {
                 width: parent.width
@@ -27,13 +27,72 @@ Mycroft.Delegate {
     id: delegate
 
     property var playlistModel: sessionData.playlistModel
+    // local copy, full models come from sessionData, deltas and pages
+    // from gui events
+    property var listModel: playlistModel
+    // pages merged into listModel around the session data window
+    property bool pagesMerged: false
+    property bool pageRequested: false
+    property bool resetting: false
     property Component emptyHighlighter: Item{}
     fillWidth: true
 
     skillBackgroundSource: sessionData.bg_image
     
     onPlaylistModelChanged: {
+        pagesMerged = false
+        setModel(playlistModel, 0)
+    }
+
+    // replace the local model keeping the view at index, the view jumps
+    // to its first item on model resets, that is not a page request
+    function setModel(model, index) {
+        resetting = true
+        listModel = model
         playlistListView.forceLayout()
+        playlistListView.currentIndex = Math.max(0, Math.min(index, model.data.length - 1))
+        playlistListView.positionViewAtIndex(playlistListView.currentIndex, ListView.Beginning)
+        resetting = false
+    }
+
+    function requestPage(page) {
+        if (!pageRequested && !resetting) {
+            pageRequested = true
+            triggerGuiEvent("playlist.page", page)
+        }
+    }
+
+    onGuiEvent: {
+        if (eventName == "ovos.common_play.playlistModel.splice") {
+            // splices are relative to the session data window, it sits
+            // somewhere inside the merged pages
+            var shift = data.previous_offset - listModel.offset
+            var moved = data.offset != data.previous_offset
+            if ((pagesMerged && moved) || shift < 0 || shift > listModel.data.length) {
+                // merged pages are stale, start over from the new window
+                pagesMerged = false
+                setModel({"data": [], "offset": data.offset, "total": data.total}, 0)
+                requestPage({"offset": data.offset})
+                return
+            }
+            var entries = listModel.data.slice()
+            for (var i = 0; i < data.splices.length; i++) {
+                var splice = data.splices[i]
+                Array.prototype.splice.apply(entries, [splice.start + shift, splice.remove].concat(splice.insert))
+            }
+            setModel({"data": entries, "offset": moved ? data.offset : listModel.offset, "total": data.total}, playlistListView.currentIndex)
+        } else if (eventName == "ovos.common_play.playlistModel.page") {
+            var index = playlistListView.currentIndex
+            if (data.offset == listModel.offset + listModel.data.length) {
+                setModel({"data": listModel.data.concat(data.data), "offset": listModel.offset, "total": data.total}, index)
+            } else if (data.offset + data.data.length == listModel.offset) {
+                setModel({"data": data.data.concat(listModel.data), "offset": data.offset, "total": data.total}, index + data.data.length)
+            } else {
+                setModel(data, 0)
+            }
+            pagesMerged = true
+            pageRequested = false
+        }
     }
 
     Keys.onBackPressed: {
@@ -68,7 +127,7 @@ Mycroft.Delegate {
         ListView {
             id: playlistListView
             keyNavigationEnabled: true
-            model: playlistModel.data
+            model: listModel.data
             focus: false
             interactive: true
             bottomMargin: delegate.controlBarItem.height + Kirigami.Units.largeSpacing
@@ -79,6 +138,19 @@ Mycroft.Delegate {
             clip: true
             highlightRangeMode: ListView.StrictlyEnforceRange
             snapMode: ListView.SnapToItem
+
+            // only a window of the entries is sent, request the pages
+            // next to it, they are merged into the local model
+            onAtYEndChanged: {
+                if (atYEnd && listModel.offset + listModel.data.length < listModel.total) {
+                    requestPage({"offset": listModel.offset + listModel.data.length})
+                }
+            }
+            onAtYBeginningChanged: {
+                if (atYBeginning && listModel.offset > 0) {
+                    requestPage({"end": listModel.offset})
+                }
+            }
             
             delegate: Controls.ItemDelegate {
                 width: parent.width
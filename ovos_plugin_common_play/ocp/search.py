@@ -1,30 +1,126 @@
+import heapq
 import random
+import re
 import time
+from collections import OrderedDict
+from itertools import count
+from threading import Event, Lock, Timer
+from urllib.parse import urlsplit, urlunsplit
+from uuid import uuid4
 
 from ovos_plugin_common_play.ocp.base import OCPAbstractComponent
+from ovos_plugin_common_play.ocp.cache import QueryCache
+from ovos_plugin_common_play.ocp.capabilities import SkillCapabilities
 from ovos_plugin_common_play.ocp.mycroft_cps import \
     MycroftCommonPlayInterface
-from ovos_plugin_common_play.ocp.media import Playlist
+from ovos_plugin_common_play.ocp.media import Playlist, MediaEntry
 from ovos_plugin_common_play.ocp.settings import OCPSettings
+from ovos_plugin_common_play.ocp.stats import SkillSearchStats
 from ovos_plugin_common_play.ocp.status import *
-from ovos_plugin_common_play.ocp.stream_handlers import available_extractors
-from ovos_utils.gui import is_gui_connected, is_gui_running
+from ovos_plugin_common_play.ocp.stream_handlers import can_play, \
+    refresh_extractors
+from ovos_utils import create_daemon
 from ovos_utils.log import LOG
 from ovos_utils.messagebus import Message
 
 
+class SearchSession:
+    """ state of a single query, each search has its own replies, deadlines
+    and completion event so several searches can run at the same time """
+
+    def __init__(self, phrase, media_type=MediaType.GENERIC, timeout=1,
+                 callback=None, background=False):
+        self.search_id = str(uuid4())
+        self.phrase = phrase
+        self.media_type = media_type
+        self.timeout = timeout  # min time, may be extended by skills
+        self.callback = callback
+        self.background = background
+        self.replies = []
+        self.active_skills = []
+        self.expected_skills = set()  # queried or acknowledged the search
+        self.answered_skills = set()
+        self.best_conf = 0
+        self.start = time.time()
+        self.first_result = None  # seconds until first result
+        self.end = None  # seconds until result selection
+        self.n_messages = 0
+        self.searching = True
+        self.done = Event()
+        self._timers = {}
+        self._timers_lock = Lock()
+
+    @property
+    def elapsed(self):
+        return time.time() - self.start
+
+    def finish(self):
+        """ stop collecting results, wakes up the waiting search """
+        self.searching = False
+        self.done.set()
+
+    def wait(self, timeout):
+        self.done.wait(timeout)
+        self.searching = False
+        self.end = self.elapsed
+        self.cancel_timers()
+
+    @property
+    def metrics(self):
+        return {"search_id": self.search_id,
+                "phrase": self.phrase,
+                "media_type": self.media_type,
+                "time_to_first_result": self.first_result,
+                "time_to_selection": self.end,
+                "messages": self.n_messages,
+                "replies": len(self.replies),
+                "results": sum(len(r.get("results", []))
+                               for r in self.replies)}
+
+    def schedule(self, name, delay, callback, restart=True):
+        """ arm a named deadline, callback runs in a timer thread
+        if restart is False an already armed deadline is kept as is """
+        with self._timers_lock:
+            timer = self._timers.get(name)
+            if timer and timer.is_alive():
+                if not restart:
+                    return
+                timer.cancel()
+            timer = Timer(delay, callback)
+            timer.daemon = True
+            self._timers[name] = timer
+            timer.start()
+
+    def cancel_timers(self):
+        with self._timers_lock:
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers = {}
+
+
 class OCPSearch(OCPAbstractComponent):
     def __init__(self, player=None):
-        super(OCPSearch, self).__init__(player)
+        # everything bind() uses must exist before the base class binds
         self.search_playlist = Playlist()
-        self.active_skills = []
-        self.query_replies = {}
-        self.query_timeouts = {}
-        self.searching = False
-        self.search_start = 0
+        # min heap with the best results, those are kept in search_playlist
+        # anything else goes to the overflow and is only loaded on request
+        self._top_results = []
+        self._overflow = []
+        self._results_counter = count()  # tie breaker, never compare dicts
+        self._results_lock = Lock()
+        self._results_keys = {}  # dedup key: heap item of the kept result
+        self.duplicates = 0
+        self.stats = SkillSearchStats()
+        self.capabilities = SkillCapabilities(self.stats)
+        self.query_cache = None
+        # finished sessions are kept around for a little while to
+        # handle late replies, oldest ones are evicted
+        self.max_finished_sessions = 5
+        self._sessions = OrderedDict()
+        self._sessions_lock = Lock()
+        self._current_search = None  # search_id shown in GUI
         self.old_cps = None
-        if player:
-            self.bind(player)
+        super(OCPSearch, self).__init__(player)
 
     def bind(self, player):
         self._player = player
@@ -32,6 +128,24 @@ class OCPSearch(OCPAbstractComponent):
             self.settings.backwards_compatibility else None
         if self.old_cps:
             self.old_cps.bind(player)
+        self.capabilities.min_samples = \
+            self.settings.adaptive_timeout_min_samples
+        if self.settings.query_cache:
+            self.query_cache = QueryCache(
+                ttl=self.settings.query_cache_ttl,
+                stale_ttl=self.settings.query_cache_stale_ttl,
+                max_entries=self.settings.query_cache_max_entries,
+                max_bytes=self.settings.query_cache_max_bytes)
+        self.add_event("ovos.common_play.search.cache.stats",
+                       self.handle_cache_stats_request)
+        self.add_event("ovos.common_play.search.more",
+                       self.handle_load_more_request)
+        self.add_event("ovos.common_play.extractors.refresh",
+                       self.handle_refresh_extractors)
+        self.add_event("ovos.common_play.announce",
+                       self.handle_skill_announce)
+        self.add_event("detach_skill",
+                       self.handle_skill_detach)
         self.add_event("ovos.common_play.skill.search_start",
                        self.handle_skill_search_start)
         self.add_event("ovos.common_play.skill.search_end",
@@ -40,39 +154,145 @@ class OCPSearch(OCPAbstractComponent):
                        self.handle_skill_response)
 
     def shutdown(self):
+        with self._sessions_lock:
+            for session in self._sessions.values():
+                session.finish()
+                session.cancel_timers()
+                self._record_misses(session)
+            self._sessions.clear()
+        self.stats.store()
+        self.remove_event("ovos.common_play.search.cache.stats")
+        self.remove_event("ovos.common_play.search.more")
+        self.remove_event("ovos.common_play.extractors.refresh")
+        self.remove_event("ovos.common_play.announce")
+        self.remove_event("detach_skill")
         self.remove_event("ovos.common_play.skill.search_start")
         self.remove_event("ovos.common_play.skill.search_end")
         self.remove_event("ovos.common_play.query.response")
 
+    @property
+    def searching(self):
+        with self._sessions_lock:
+            return any(s.searching for s in self._sessions.values())
+
+    # search sessions
+    def _add_session(self, session):
+        with self._sessions_lock:
+            self._sessions[session.search_id] = session
+            finished = [k for k, s in self._sessions.items()
+                        if not s.searching]
+            for search_id in finished[:-self.max_finished_sessions or None]:
+                self._record_misses(self._sessions.pop(search_id))
+        if not session.background:
+            self._current_search = session.search_id
+
+    def _record_misses(self, session):
+        """ skills that did not answer before the session was dropped,
+        late replies were recorded as they arrived """
+        for skill_id in session.expected_skills - session.answered_skills:
+            self.stats.record_miss(skill_id, session.media_type)
+
+    def _get_session(self, message):
+        search_id = message.data.get("search_id") or \
+                    message.context.get("search_id")
+        phrase = message.data.get("phrase")
+        with self._sessions_lock:
+            if search_id:
+                return self._sessions.get(search_id)
+            # skill did not report the search_id, newest match by phrase
+            for session in reversed(self._sessions.values()):
+                if session.phrase == phrase:
+                    return session
+        return None
+
+    def _get_searching_sessions(self, message):
+        session = self._get_session(message)
+        if session:
+            return [session] if session.searching else []
+        with self._sessions_lock:
+            return [s for s in self._sessions.values() if s.searching]
+
+    def _is_current(self, session):
+        return session.search_id == self._current_search
+
+    def handle_cache_stats_request(self, message):
+        stats = self.query_cache.stats if self.query_cache else {}
+        self.bus.emit(message.reply(
+            "ovos.common_play.search.cache.stats.response", stats))
+
+    def handle_load_more_request(self, message):
+        n = message.data.get("count") or self.settings.search_max_results
+        loaded = self.load_more(n)
+        self.bus.emit(message.reply("ovos.common_play.search.more.response",
+                                    {"loaded": loaded,
+                                     "remaining": len(self._overflow)}))
+
+    def handle_refresh_extractors(self, message):
+        # check again for optional stream handler dependencies
+        extractors = refresh_extractors()
+        LOG.info(f"available stream extractors: {extractors}")
+
+    def handle_skill_announce(self, message):
+        """ skills may declare the media types they can answer, known
+        skills receive targeted queries in
+        ovos.common_play.query.{skill_id} """
+        skill_id = message.data["skill_id"]
+        self.capabilities.seen(skill_id)
+        media_types = message.data.get("media_types")
+        if media_types:
+            LOG.debug(f"{skill_id} answers media types: {media_types}")
+            self.capabilities.declare(skill_id, media_types)
+
+    def handle_skill_detach(self, message):
+        skill_id = message.data.get("skill_id", "").rstrip(":")
+        self.capabilities.remove(skill_id)
+
     def handle_skill_search_start(self, message):
         skill_id = message.data["skill_id"]
         LOG.debug(f"{message.data['skill_id']} is searching")
-        if skill_id not in self.active_skills:
-            self.active_skills.append(skill_id)
+        self.capabilities.seen(skill_id)
+        for session in self._get_searching_sessions(message):
+            session.n_messages += 1
+            session.expected_skills.add(skill_id)
+            if skill_id not in session.active_skills:
+                session.active_skills.append(skill_id)
 
     def handle_skill_response(self, message):
-        search_phrase = message.data["phrase"]
         timeout = message.data.get("timeout")
         skill_id = message.data['skill_id']
         # LOG.debug(f"OVOSCommonPlay result: {skill_id}")
+        self.capabilities.seen(skill_id)
+        session = self._get_session(message)
+        if session is None:
+            return  # expired search
+        session.n_messages += 1
 
         if message.data.get("searching"):
             # extend the timeout by N seconds
-            if timeout and self.settings.allow_extensions and \
-                    search_phrase in self.query_timeouts:
-                self.query_timeouts[search_phrase] += timeout
-            # else -> expired search
+            if timeout and self.settings.allow_extensions:
+                session.timeout += timeout
+
+        else:
+            if skill_id not in session.answered_skills:
+                # late replies are sampled too, else the learned latency
+                # only ever includes skills faster than the deadline
+                session.answered_skills.add(skill_id)
+                self.stats.record(skill_id, session.media_type,
+                                  session.elapsed,
+                                  hit=bool(message.data.get("results")))
+            if session.searching and session.first_result is None and \
+                    message.data.get("results"):
+                session.first_result = session.elapsed
 
-        elif search_phrase in self.query_replies:
             # Collect replies until the timeout
-            if not self.searching and not len(
-                    self.query_replies[search_phrase]):
+            if not session.searching and not len(session.replies):
                 LOG.debug("  too late!! ignored in track selection process")
                 LOG.warning(
                     f"{message.data['skill_id']} is not answering fast "
                     "enough!")
 
-            has_gui = is_gui_running() or is_gui_connected(self.bus)
+            is_current = self._is_current(session)
+            has_gui = self.gui.has_gui
             results = message.data.get("results", [])
             for idx, res in enumerate(results):
                 # filter uris we can play, usually files and http streams, but some
@@ -80,16 +300,13 @@ class OCPSearch(OCPAbstractComponent):
                 # eg. soundcloud, rss, youtube, deezer....
                 uri = res.get("uri", "")
                 if res.get("playlist") and not uri:
-                    res["playlist"] = [
-                        r for r in res["playlist"]
-                        if r.get("uri") and any(r.get("uri").startswith(e)
-                               for e in available_extractors())]
+                    res["playlist"] = [r for r in res["playlist"]
+                                       if can_play(r.get("uri"))]
                     if not len(res["playlist"]):
                         results[idx] = None  # can't play this search result!
                         LOG.error(f"Empty playlist for {res}")
                         continue
-                elif uri and not any(uri.startswith(e) for e in
-                             available_extractors()):
+                elif uri and not can_play(uri):
                     results[idx] = None  # can't play this search result!
                     LOG.error(f"stream handler not available for {res}")
                     continue
@@ -105,10 +322,12 @@ class OCPSearch(OCPAbstractComponent):
                         res["match_confidence"] -= 10
                         results[idx] = res
 
-                if res not in self.search_playlist:
-                    self.search_playlist.add_entry(res)
+                if is_current:
+                    with self._results_lock:
+                        is_top = self._add_result(res)
                     # update search UI
-                    if self.searching and res["match_confidence"] >= 30:
+                    if is_top and session.searching and \
+                            res["match_confidence"] >= 30:
                         self.gui["footer_text"] = \
                             f"skill - {skill_id}\n" \
                             f"match - {res['title']}\n" \
@@ -116,21 +335,25 @@ class OCPSearch(OCPAbstractComponent):
 
             # remove filtered results
             message.data["results"] = [r for r in results if r is not None]
-            self.query_replies[search_phrase].append(message.data)
+            session.replies.append(message.data)
+
+            # report new best candidates while still searching
+            if session.searching and session.callback:
+                self._update_candidates(session, message.data["results"])
 
             # abort searching if we gathered enough results
             # TODO ensure we have a decent confidence match, if all matches
             #  are < 50% conf extend timeout instead
-            if time.time() - self.search_start > self.query_timeouts[
-                search_phrase]:
-                if self.searching:
-                    self.searching = False
+            if session.elapsed > session.timeout:
+                if session.searching:
+                    session.finish()
                     LOG.debug("common play query timeout, parsing results")
-                    self.gui["footer_text"] = "Timeout!\n " \
-                                              "selecting best result\n" \
-                                              " "
+                    if is_current:
+                        self.gui["footer_text"] = "Timeout!\n " \
+                                                  "selecting best result\n" \
+                                                  " "
 
-            elif self.searching:
+            elif session.searching:
                 for res in message.data.get("results", []):
                     if res.get("match_confidence",
                                0) >= self.settings.early_stop_thresh:
@@ -138,81 +361,319 @@ class OCPSearch(OCPAbstractComponent):
                         LOG.info(
                             "Receiving very high confidence match, stopping "
                             "search early")
-                        self.gui["footer_text"] = \
-                            f"High confidence match!\n " \
-                            f"skill - {skill_id}\n" \
-                            f"match - {res['title']}\n" \
-                            f"confidence - {res['match_confidence']} "
+                        if is_current:
+                            self.gui["footer_text"] = \
+                                f"High confidence match!\n " \
+                                f"skill - {skill_id}\n" \
+                                f"match - {res['title']}\n" \
+                                f"confidence - {res['match_confidence']} "
                         # allow other skills to "just miss"
                         if self.settings.early_stop_grace_period:
                             LOG.debug(
                                 f"  - grace period: {self.settings.early_stop_grace_period} seconds")
-                            time.sleep(self.settings.early_stop_grace_period)
-                        self.searching = False
+                            session.schedule(
+                                "grace_period",
+                                self.settings.early_stop_grace_period,
+                                session.finish, restart=False)
+                        else:
+                            session.finish()
                         return
 
     def handle_skill_search_end(self, message):
         skill_id = message.data["skill_id"]
         LOG.debug(f"{message.data['skill_id']} finished search")
-        if skill_id in self.active_skills:
-            self.active_skills.remove(skill_id)
-
-        # if this was the last skill end searching period
-        time.sleep(0.5)
-        # TODO this sleep is hacky, but avoids a race condition in
-        # case some skill just decides to respond before the others even
-        # acknowledge search is starting, this gives more than enough time
-        # for self.active_seaching to be populated, a better approach should
-        # be employed but this works fine for now
-        if not self.active_skills and self.searching:
+        for session in self._get_searching_sessions(message):
+            session.n_messages += 1
+            if skill_id in session.active_skills:
+                session.active_skills.remove(skill_id)
+
+            # if this was the last skill end searching period, wait a little
+            # before checking, avoids a race condition in case some skill
+            # just decides to respond before the others even acknowledge
+            # search is starting, every search_end message restarts the
+            # settle window
+            session.schedule("settle", 0.5,
+                             lambda s=session: self._handle_search_settled(s))
+        self.gui.update_search_results()
+
+    def _handle_search_settled(self, session):
+        if not session.active_skills and session.searching:
             LOG.info("Received search responses from all skills!")
-            self.gui["footer_text"] = "Received search responses from all " \
-                                      "skills!\nselecting best result"
-            self.searching = False
+            if self._is_current(session):
+                self.gui["footer_text"] = "Received search responses from " \
+                                          "all skills!\nselecting best result"
+            session.finish()
+
+    def _update_candidates(self, session, results):
+        best = max([r.get("match_confidence", 0) for r in results] or [0])
+        if best <= session.best_conf:
+            return
+        session.best_conf = best
+        if best >= self.settings.speculative_min_conf:
+            self._emit_candidates(session)
+        elif best >= self.settings.min_score:
+            # wait to see if this stays the best result
+            session.schedule("speculative",
+                             self.settings.speculative_min_age,
+                             lambda: self._emit_candidates(session))
+
+    @staticmethod
+    def _emit_candidates(session):
+        if session.searching and session.callback:
+            session.callback([r for r in session.replies if r.get("results")])
+
+    def search(self, phrase, media_type=MediaType.GENERIC, callback=None):
+        """ query skills for phrase, if callback is provided it is called
+        with the results gathered so far whenever a good candidate is found
+        while the search is still running """
+        # old results are not worth resolving anymore
+        self.player.prefetcher.cancel("search")
+        if self.query_cache is not None:
+            results, is_stale = self.query_cache.get_results(phrase,
+                                                             media_type)
+            if results is not None:
+                LOG.info(f"OVOSCommonPlay using cached results for: {phrase}")
+                # no skills are queried, but this is still a new search
+                self._current_search = search_id = str(uuid4())
+                self._load_results(results)
+                if is_stale:
+                    # serve the stale results now, refresh them for next time
+                    create_daemon(self._refresh_cached_results,
+                                  (phrase, media_type, search_id))
+                return results
+
+        results = self._query_skills(phrase, media_type, callback=callback)
+        if self.query_cache is not None:
+            self.query_cache.cache_results(phrase, results, media_type)
+        return results
+
+    def _refresh_cached_results(self, phrase, media_type, search_id=None):
+        LOG.debug(f"OVOSCommonPlay refreshing cached results for: {phrase}")
+        results = self._query_skills(phrase, media_type, background=True)
+        self.query_cache.cache_results(phrase, results, media_type)
+        # only update the GUI if no other search happened meanwhile
+        if results and self._current_search == search_id:
+            self._load_results(results)
+
+    def _load_results(self, results):
+        self.set_results([res for r in results
+                          for res in r.get("results", [])])
+
+    # search results
+    def set_results(self, results):
+        """ replace the search results, only the best
+        search_max_results are kept in search_playlist """
+        with self._results_lock:
+            self._clear_results()
+            for res in results:
+                self._add_result(res)
+            self.search_playlist.sort_by_conf()
         self.gui.update_search_results()
 
-    def search(self, phrase, media_type=MediaType.GENERIC):
-        # stop any search still happening
-        self.bus.emit(Message("ovos.common_play.search.stop"))
-        self.gui.show_search_spinner()
-        self.clear()
-        self.query_replies[phrase] = []
-        self.query_timeouts[phrase] = self.settings.min_timeout
-        self.search_start = time.time()
-        self.searching = True
-        self.bus.emit(Message('ovos.common_play.query',
-                              {"phrase": phrase,
-                               "question_type": media_type}))
+    @property
+    def has_more(self):
+        return bool(self._overflow)
+
+    def load_more(self, n=None):
+        """ move the next n best results from the overflow into
+        search_playlist, returns number of results loaded """
+        n = n or self.settings.search_max_results
+        with self._results_lock:
+            self._overflow.sort(reverse=True)
+            page = self._overflow[:n]
+            self._overflow = self._overflow[n:]
+            for _, _, res in page:
+                self.search_playlist.add_entry(res)
+        if page:
+            self.gui.update_search_results()
+        return len(page)
+
+    def _add_result(self, res):
+        """ returns True if the result made it into search_playlist """
+        if isinstance(res, MediaEntry):
+            res = res.as_dict
+        keys = self._get_dedup_keys(res)
+        for k in keys:
+            if k in self._results_keys:
+                self._merge_result(self._results_keys[k], res)
+                return False
+        # lists so merging can bump the confidence in place
+        item = [res.get("match_confidence", 0),
+                next(self._results_counter), res]
+        for k in keys:
+            self._results_keys[k] = item
+        if len(self._top_results) < self.settings.search_max_results:
+            heapq.heappush(self._top_results, item)
+        elif item[0] > self._top_results[0][0]:
+            evicted = heapq.heapreplace(self._top_results, item)
+            if evicted[2] in self.search_playlist:
+                self.search_playlist.remove_entry(evicted[2])
+            self._add_overflow(evicted)
+        else:
+            self._add_overflow(item)
+            return False
+        self.search_playlist.add_entry(res)
+        return True
+
+    @staticmethod
+    def _get_dedup_keys(res):
+        keys = []
+        uri = res.get("uri")
+        if uri:
+            keys.append(OCPSearch._normalize_uri(uri))
+        title, artist = res.get("title"), res.get("artist")
+        if title and artist:
+            keys.append((" ".join(title.lower().split()),
+                         " ".join(artist.lower().split())))
+        return keys
+
+    @staticmethod
+    def _normalize_uri(uri):
+        """ strip extractor prefixes, www, fragments and trailing slashes
+        eg. "youtube//https://www.youtube.com/watch?v=xxx#t=1" ->
+        "https://youtube.com/watch?v=xxx" """
+        uri = re.sub(r"^[\w.-]+//(?=[\w.+-]+:)", "", uri.strip())
+        try:
+            parts = urlsplit(uri)
+        except ValueError:
+            return uri
+        netloc = parts.netloc.lower()
+        if netloc.startswith("www."):
+            netloc = netloc[4:]
+        return urlunsplit((parts.scheme.lower(), netloc,
+                           parts.path.rstrip("/"), parts.query, ""))
+
+    @staticmethod
+    def _merge_into(kept, res):
+        """ merge a duplicate result into the one already kept, the kept
+        result lists every skill offering it and the max confidence,
+        returns True if the confidence was bumped """
+        skills = kept.get("skills") or [kept.get("skill_id")]
+        if res.get("skill_id") not in skills:
+            skills.append(res.get("skill_id"))
+        kept["skills"] = skills
+        conf = res.get("match_confidence", 0)
+        if conf > kept.get("match_confidence", 0):
+            kept["match_confidence"] = conf
+            return True
+        return False
+
+    @classmethod
+    def dedup_results(cls, results):
+        """ merge duplicate results offered by different skills,
+        order is kept, each result appears once at its first position """
+        kept = {}
+        deduped = []
+        for res in results:
+            keys = cls._get_dedup_keys(res)
+            match = next((kept[k] for k in keys if k in kept), None)
+            if match is not None:
+                cls._merge_into(match, res)
+                continue
+            for k in keys:
+                kept[k] = res
+            deduped.append(res)
+        return deduped
+
+    def _merge_result(self, item, res):
+        kept = item[2]
+        self.duplicates += 1
+        if self._merge_into(kept, res):
+            item[0] = kept["match_confidence"]
+            if any(i is item for i in self._top_results):
+                heapq.heapify(self._top_results)
+            elif self._top_results and \
+                    item[0] > self._top_results[0][0]:
+                self._promote(item)
+                return
+        idx = self.search_playlist.index_of(kept)
+        if idx is not None:
+            entry = self.search_playlist[idx]
+            entry.match_confidence = item[0]
+            entry.data["skills"] = kept["skills"]
+
+    def _promote(self, item):
+        """ an overflow result got a better confidence than the worst
+        top result, swap them """
+        idx = next((i for i, o in enumerate(self._overflow) if o is item),
+                   None)
+        if idx is None:
+            return  # already loaded into search_playlist or trimmed
+        self._overflow.pop(idx)
+        evicted = heapq.heapreplace(self._top_results, item)
+        if evicted[2] in self.search_playlist:
+            self.search_playlist.remove_entry(evicted[2])
+        self._add_overflow(evicted)
+        self.search_playlist.add_entry(item[2])
+
+    def _add_overflow(self, item):
+        self._overflow.append(item)
+        max_overflow = self.settings.search_max_overflow
+        if len(self._overflow) > 2 * max_overflow:
+            # amortized trim, drop the worst results
+            self._overflow.sort(reverse=True)
+            del self._overflow[max_overflow:]
+
+    def _clear_results(self):
+        self.search_playlist.clear()
+        self._top_results = []
+        self._overflow = []
+        self._results_keys = {}
+        self.duplicates = 0
+
+    def _query_skills(self, phrase, media_type=MediaType.GENERIC,
+                      background=False, callback=None):
+        if not self.searching:
+            # stop any search still happening
+            self.bus.emit(Message("ovos.common_play.search.stop"))
+        session = SearchSession(phrase, media_type,
+                                timeout=self.settings.min_timeout,
+                                callback=callback, background=background)
+        self._add_session(session)
+        if not background:
+            self.gui.show_search_spinner()
+            self.clear()
+
+        targets = self.capabilities.get_targets(media_type) \
+            if self.settings.capability_routing else None
+        query = {"phrase": phrase, "question_type": media_type,
+                 "search_id": session.search_id}
+        context = {"search_id": session.search_id}
+        if targets:
+            # only query skills that can answer this media type
+            LOG.debug(f"OVOSCommonPlay querying skills: {targets}")
+            session.expected_skills.update(targets)
+            for skill_id in targets:
+                self.bus.emit(Message(f'ovos.common_play.query.{skill_id}',
+                                      query, context))
+        else:
+            self.bus.emit(Message('ovos.common_play.query', query, context))
         # old common play will send the messages expected by the official
         # mycroft stack, but skills are know to over match, dont support
         # match type, and the VIDEO is different for every skill, it may also
         # cause issues with status tracking and mess up playlists
-        if self.old_cps:
+        # old style skills can not be routed, they are always queried
+        query_old_cps = self.old_cps is not None
+        if query_old_cps:
             self.old_cps.send_query(phrase, media_type)
 
-        # if there is no match type defined, lets increase timeout a bit
-        # since all skills need to search
-        if media_type == MediaType.GENERIC:
-            bonus = 3  # timeout bonus
-        else:
-            bonus = 0
-
-        while self.searching and \
-                time.time() - self.search_start <= self.settings.max_timeout + bonus:
-            time.sleep(0.1)
-
-        self.searching = False
+        # wait until the bus handlers signal the end of the search or the
+        # timeout expires, whatever happens first
+        session.wait(self.get_timeout(media_type))
+        self.stats.store()
+        self._report_metrics(session)
 
         # convert the returned data to the expected new format, playback
         # type is consider Skill, ovos common play will not handle the playback
         # life cycle but instead delegate to the skill
-        if self.old_cps:
+        replies = list(session.replies)
+        if query_old_cps:
             old_style = self.old_cps.get_results(phrase)
-            self.query_replies[phrase] += self._mycroft2ovos(old_style,
-                                                             media_type)
-        self.gui.update_search_results()
-        if self.query_replies.get(phrase):
-            return [s for s in self.query_replies[phrase] if s.get("results")]
+            replies += self._mycroft2ovos(old_style, media_type)
+        if self._is_current(session):
+            self.gui.update_search_results()
+        if replies:
+            return [s for s in replies if s.get("results")]
 
         # fallback to generic search type
         if self.settings.search_fallback and media_type != MediaType.GENERIC:
@@ -220,9 +681,41 @@ class OCPSearch(OCPAbstractComponent):
             #  query again
             LOG.debug(
                 "OVOSCommonPlay falling back to MediaType.GENERIC")
-            return self.search(phrase, media_type=MediaType.GENERIC)
+            return self._query_skills(phrase, media_type=MediaType.GENERIC,
+                                      background=background,
+                                      callback=callback)
         return []
 
+    def _report_metrics(self, session):
+        metrics = session.metrics
+        if self._is_current(session):
+            metrics["duplicates"] = self.duplicates
+        LOG.debug(f"OVOSCommonPlay search metrics: {metrics}")
+        if self.settings.search_metrics:
+            self.bus.emit(Message("ovos.common_play.search.metrics",
+                                  metrics))
+
+    def get_timeout(self, media_type=MediaType.GENERIC):
+        """ max time to wait for skill replies """
+        # if there is no match type defined, lets increase timeout a bit
+        # since all skills need to search
+        if media_type == MediaType.GENERIC:
+            bonus = 3  # timeout bonus
+        else:
+            bonus = 0
+        timeout = self.settings.max_timeout + bonus
+        if self.settings.adaptive_timeout:
+            # wait only as long as the skills that usually have results
+            # for this media type take to answer
+            expected = self.stats.get_timeout(
+                media_type,
+                min_samples=self.settings.adaptive_timeout_min_samples)
+            if expected is not None:
+                timeout = max(self.settings.min_timeout,
+                              min(timeout, expected))
+                LOG.debug(f"adaptive search timeout: {timeout} seconds")
+        return timeout
+
     def search_skill(self, skill_id, phrase,
                      media_type=MediaType.GENERIC):
         res = [r for r in self.search(phrase, media_type)
@@ -273,7 +766,8 @@ class OCPSearch(OCPAbstractComponent):
         return selected
 
     def clear(self):
-        self.search_playlist.clear()
+        with self._results_lock:
+            self._clear_results()
         self.gui.update_search_results()
 
     # TODO move to mycroft class
@@ -45,11 +45,42 @@ class OCPSettings(PrivateSettings):
 
     @property
     def early_stop_grace_period(self):
-        """early_stop_grace_period (float): sleep this amount before early stop,
+        """early_stop_grace_period (float): wait this amount before early stop,
                                    allows skills that "just miss" to also be
                                    taken into account"""
         return self.get("early_stop_grace_period", 1.0)
 
+    @property
+    def speculative_playback(self):
+        """speculative_playback (bool): if True start playing the best result
+                                       found so far before the search ends,
+                                       late results update the disambiguation
+                                       list instead"""
+        return self.get("speculative_playback", False)
+
+    @property
+    def speculative_min_conf(self):
+        """speculative_min_conf (int): start speculative playback as soon as
+                                      a result with confidence >= this value
+                                      is received"""
+        return self.get("speculative_min_conf", 80)
+
+    @property
+    def speculative_min_age(self):
+        """speculative_min_age (float): start speculative playback of a result
+                                       with confidence >= min_score once it
+                                       remains the best match for this many
+                                       seconds"""
+        return self.get("speculative_min_age", 1.5)
+
+    @property
+    def speculative_switch_window(self):
+        """speculative_switch_window (float): a better result received up to
+                                             this many seconds after
+                                             speculative playback started
+                                             replaces the playing track"""
+        return self.get("speculative_switch_window", 3)
+
     @property
     def backwards_compatibility(self):
         """backwards_compatibility (bool): if True emits the regular
@@ -112,6 +143,149 @@ class OCPSettings(PrivateSettings):
                                  results, selection is triggered"""
         return self.get("max_timeout", 5)
 
+    @property
+    def capability_routing(self):
+        """capability_routing (bool): if True, and every skill seen so far
+                                     either declared its media types or
+                                     answered enough queries, query only
+                                     the skills that can answer the
+                                     requested media type instead of
+                                     broadcasting"""
+        return self.get("capability_routing", False)
+
+    @property
+    def adaptive_timeout(self):
+        """adaptive_timeout (bool): if True, learn how long each skill takes
+                                   to answer and only wait for the skills
+                                   that usually have results for the
+                                   requested media type,
+                                   min_timeout <= timeout <= max_timeout"""
+        return self.get("adaptive_timeout", True)
+
+    @property
+    def adaptive_timeout_min_samples(self):
+        """adaptive_timeout_min_samples (int): number of answers needed
+                                              before a skill latency is
+                                              taken into account"""
+        return self.get("adaptive_timeout_min_samples", 5)
+
+    @property
+    def search_metrics(self):
+        """search_metrics (bool): if True, emit timing metrics for every
+                                 search and playback request, useful to
+                                 measure the effect of timeout and early
+                                 stop settings"""
+        return self.get("search_metrics", False)
+
+    @property
+    def query_cache(self):
+        """query_cache (bool): if True, remember search results and reuse
+                              them for repeated queries"""
+        return self.get("query_cache", True)
+
+    @property
+    def query_cache_ttl(self):
+        """query_cache_ttl (float): seconds cached results are considered
+                                   fresh, after that they are still used but
+                                   refreshed in the background"""
+        return self.get("query_cache_ttl", 60)
+
+    @property
+    def query_cache_stale_ttl(self):
+        """query_cache_stale_ttl (float): seconds until cached results are
+                                         discarded"""
+        return self.get("query_cache_stale_ttl", 3600)
+
+    @property
+    def query_cache_max_entries(self):
+        return self.get("query_cache_max_entries", 50)
+
+    @property
+    def query_cache_max_bytes(self):
+        """query_cache_max_bytes (int): memory cap for the query cache,
+                                       least recently used queries are
+                                       evicted first"""
+        return self.get("query_cache_max_bytes", 1024 * 1024)
+
+    @property
+    def persist_state(self):
+        """persist_state (bool): save playlist, search results and player
+                                state to disk and restore them on startup"""
+        return self.get("persist_state", True)
+
+    @property
+    def state_compact_every(self):
+        """state_compact_every (int): number of journal records after which
+                                     a full snapshot is written"""
+        return self.get("state_compact_every", 500)
+
+    @property
+    def history_max_entries(self):
+        """history_max_entries (int): max number of tracks kept in the
+                                     play history"""
+        return self.get("history_max_entries", 1000)
+
+    @property
+    def history_policy(self):
+        """history_policy (str): which tracks to forget when the play
+                                history is full, "lru" (least recently
+                                played) or "lfu" (least played)"""
+        return self.get("history_policy", "lru")
+
+    @property
+    def stream_cache(self):
+        """stream_cache (bool): reuse resolved streams until they expire,
+                               eg. when replaying or going back a track"""
+        return self.get("stream_cache", True)
+
+    @property
+    def stream_cache_max_entries(self):
+        """stream_cache_max_entries (int): max number of resolved streams
+                                          kept in the stream cache"""
+        return self.get("stream_cache_max_entries", 100)
+
+    @property
+    def prefetch(self):
+        """prefetch (bool): resolve upcoming tracks in the background"""
+        return self.get("prefetch", True)
+
+    @property
+    def prefetch_tracks(self):
+        """prefetch_tracks (int): number of upcoming tracks to resolve"""
+        return self.get("prefetch_tracks", 2)
+
+    @property
+    def prefetch_search_results(self):
+        """prefetch_search_results (int): number of best search results to
+                                         resolve in the background"""
+        return self.get("prefetch_search_results", 3)
+
+    @property
+    def prefetch_workers(self):
+        """prefetch_workers (int): number of threads resolving streams in
+                                  the background"""
+        return self.get("prefetch_workers", 2)
+
+    @property
+    def search_max_results(self):
+        """search_max_results (int): max number of results shown in the
+                                    disambiguation list, lower confidence
+                                    results are only loaded on request"""
+        return self.get("search_max_results", 50)
+
+    @property
+    def gui_page_size(self):
+        """gui_page_size (int): max number of entries sent to the GUI in the
+                               playlist and search models, other pages are
+                               requested by the GUI while scrolling"""
+        return self.get("gui_page_size", 50)
+
+    @property
+    def search_max_overflow(self):
+        """search_max_overflow (int): max number of extra results kept
+                                     around to be loaded on request"""
+        return self.get("search_max_overflow", 500)
+
     @property
     def min_score(self):
         return self.get("min_score", 50)
@@ -167,3 +341,30 @@ class OCPSettings(PrivateSettings):
         """
         return self.get("bandcamp_backend") or BandcampBackend.PYBANDCAMP
 
+    def _get_hedge_delay(self, key, default=None):
+        delay = self.get(key, default)
+        if delay is None or delay < 0:
+            return None
+        return delay
+
+    @property
+    def youtube_hedge_delay(self):
+        """youtube_hedge_delay (float): seconds to wait for the youtube
+                                       backend before racing the alternate
+                                       one, 0 races both from the start,
+                                       unset (default) or negative only
+                                       falls back on errors"""
+        return self._get_hedge_delay("youtube_hedge_delay")
+
+    @property
+    def yt_chlive_hedge_delay(self):
+        """yt_chlive_hedge_delay (float): same as youtube_hedge_delay, for
+                                         youtube channel live streams"""
+        return self._get_hedge_delay("yt_chlive_hedge_delay")
+
+    @property
+    def bandcamp_hedge_delay(self):
+        """bandcamp_hedge_delay (float): same as youtube_hedge_delay, for
+                                        bandcamp streams"""
+        return self._get_hedge_delay("bandcamp_hedge_delay")
+
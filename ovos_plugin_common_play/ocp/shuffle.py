@@ -0,0 +1,112 @@
+import random
+
+
+class ShuffleOrder:
+    """ lazily generated Fisher-Yates permutation of playlist positions
+
+    only the swapped slots are stored, the virtual array is the identity
+    everywhere else, so each step is O(1) regardless of playlist size
+
+    slots [0, drawn) hold the positions already played in shuffle order,
+    cursor is the slot being played, next/prev walk the drawn slots and
+    only draw a new random position when moving past the last one, no
+    position repeats until the cycle is complete """
+
+    def __init__(self, n=0):
+        self.reset(n)
+
+    def reset(self, n):
+        self.n = n
+        self.drawn = 0
+        self.cursor = -1
+        self._perm = {}  # slot -> position, only if not identity
+        self._where = {}  # position -> slot, only if not identity
+
+    def start(self, position):
+        """ new cycle starting at the current playlist position """
+        self.reset(self.n)
+        if 0 <= position < self.n:
+            self._draw(position)
+            self.cursor = 0
+
+    @property
+    def history(self):
+        """ positions played so far in this cycle """
+        return [self._get(slot) for slot in range(self.drawn)]
+
+    def _get(self, slot):
+        return self._perm.get(slot, slot)
+
+    def _slot_of(self, position):
+        return self._where.get(position, position)
+
+    def _set(self, slot, position):
+        if slot == position:
+            self._perm.pop(slot, None)
+            self._where.pop(position, None)
+        else:
+            self._perm[slot] = position
+            self._where[position] = slot
+
+    def _draw(self, position=None):
+        """ fix the next slot, to a random undrawn position
+        or to the given one """
+        k = self.drawn
+        if position is None:
+            j = random.randint(k, self.n - 1)
+        else:
+            j = self._slot_of(position)
+        pk, pj = self._get(k), self._get(j)
+        self._set(k, pj)
+        self._set(j, pk)
+        self.drawn += 1
+
+    def next(self):
+        """ next position, None once every position was played """
+        if self.cursor + 1 >= self.drawn:
+            if self.drawn >= self.n:
+                return None
+            self._draw()
+        self.cursor += 1
+        return self._get(self.cursor)
+
+    def prev(self):
+        """ previous position in shuffle order, None at the start """
+        if self.cursor <= 0:
+            return None
+        self.cursor -= 1
+        return self._get(self.cursor)
+
+    def upcoming(self, n=1):
+        """ next n positions without moving the cursor, positions are
+        drawn ahead of time if needed so next() returns the same ones """
+        end = min(self.cursor + 1 + n, self.n)
+        while self.drawn < end:
+            self._draw()
+        return [self._get(slot) for slot in range(self.cursor + 1, end)]
+
+    # playlist changes
+    def insert(self, position):
+        """ a position was inserted in the playlist """
+        if position >= self.n:
+            # appended, undrawn by default
+            self.n += 1
+            return
+        history = [p + 1 if p >= position else p for p in self.history]
+        self._replay(self.n + 1, history, self.cursor)
+
+    def remove(self, position):
+        """ a position was removed from the playlist """
+        cursor = self.cursor
+        slot = self._slot_of(position)
+        if slot < self.drawn and slot <= cursor:
+            cursor -= 1
+        history = [p - 1 if p > position else p
+                   for p in self.history if p != position]
+        self._replay(self.n - 1, history, cursor)
+
+    def _replay(self, n, history, cursor):
+        self.reset(n)
+        for position in history:
+            self._draw(position)
+        self.cursor = cursor
@@ -0,0 +1,86 @@
+from threading import Lock
+
+from json_database import JsonStorageXDG
+from ovos_plugin_common_play.ocp.status import MediaType
+from ovos_utils.log import LOG
+
+
+class SkillSearchStats:
+    """ per skill response times and hit rates for each MediaType
+
+    used to predict how long a search needs to wait for the skills that
+    usually have matches, data is persisted across restarts """
+
+    def __init__(self, name="ocp_search_stats", max_samples=50):
+        self.max_samples = max_samples
+        self._db = JsonStorageXDG(name, subfolder="OCP")
+        self._lock = Lock()
+
+    def _skill_stats(self, skill_id, media_type):
+        mtype = self._db.setdefault(str(int(media_type)), {})
+        return mtype.setdefault(skill_id, {"latencies": [],
+                                           "queries": 0,
+                                           "hits": 0})
+
+    def record(self, skill_id, media_type, latency, hit):
+        """ record a skill answering a query after latency seconds,
+        hit is True if the skill returned any results """
+        with self._lock:
+            stats = self._skill_stats(skill_id, media_type)
+            stats["queries"] += 1
+            if hit:
+                stats["hits"] += 1
+            stats["latencies"].append(round(latency, 3))
+            stats["latencies"] = stats["latencies"][-self.max_samples:]
+
+    def record_miss(self, skill_id, media_type):
+        """ record a skill that never answered a query, there is no
+        latency sample but it counts against its hit rate """
+        with self._lock:
+            self._skill_stats(skill_id, media_type)["queries"] += 1
+
+    def store(self):
+        with self._lock:
+            try:
+                self._db.store()
+            except Exception as e:
+                LOG.error(f"failed to save search stats: {e}")
+
+    def get_skills(self, media_type=MediaType.GENERIC):
+        return list(self._db.get(str(int(media_type)), {}))
+
+    def queries(self, skill_id, media_type=MediaType.GENERIC):
+        stats = self._db.get(str(int(media_type)), {}).get(skill_id)
+        return stats["queries"] if stats else 0
+
+    def hit_rate(self, skill_id, media_type=MediaType.GENERIC):
+        stats = self._db.get(str(int(media_type)), {}).get(skill_id)
+        if not stats or not stats["queries"]:
+            return 0
+        return stats["hits"] / stats["queries"]
+
+    def latency(self, skill_id, media_type=MediaType.GENERIC, percentile=95):
+        stats = self._db.get(str(int(media_type)), {}).get(skill_id)
+        if not stats or not stats["latencies"]:
+            return None
+        latencies = sorted(stats["latencies"])
+        idx = min(len(latencies) - 1,
+                  int(round(percentile / 100 * (len(latencies) - 1))))
+        return latencies[idx]
+
+    def get_timeout(self, media_type=MediaType.GENERIC, min_samples=5,
+                    min_hit_rate=0.1, percentile=95):
+        """ time needed for the skills that usually have results for this
+        media type to answer, None if there is not enough data yet """
+        timeout = None
+        with self._lock:
+            for skill_id, stats in \
+                    self._db.get(str(int(media_type)), {}).items():
+                if stats["queries"] < min_samples or \
+                        self.hit_rate(skill_id, media_type) < min_hit_rate:
+                    # slow skills that never match are not waited for
+                    continue
+                latency = self.latency(skill_id, media_type, percentile)
+                if timeout is None or latency > timeout:
+                    timeout = latency
+        return timeout
@@ -76,18 +76,97 @@ def is_bandcamp_available():
         return False
 
 
+class PrefixTrie:
+    """ maps uri prefixes to values, lookups walk the uri once """
+
+    def __init__(self):
+        self._root = {}
+
+    def add(self, prefix, value):
+        node = self._root
+        for char in prefix:
+            node = node.setdefault(char, {})
+        node[None] = value  # None is never a char, marks end of prefix
+
+    def longest_match(self, uri):
+        """ value of the longest prefix of uri, None if no prefix matches """
+        match = None
+        node = self._root
+        for char in uri:
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                match = node[None]
+        return match
+
+
+class StreamExtractors:
+    """ extractor availability is checked once and cached, call refresh()
+    after installing/removing optional dependencies """
+    # uri prefix: availability check
+    checks = {
+        "/": None,
+        "http": None,
+        "deezer//": is_deezer_available,
+        "rss//": is_rss_available,
+        "ydl//": is_ydl_available,
+        "youtube//": is_youtube_available,
+        "youtube.channel.live//": is_ytchlive_available,
+        "bandcamp//": is_bandcamp_available
+    }
+
+    def __init__(self):
+        self._trie = None
+        self._available = []
+
+    def refresh(self):
+        trie = PrefixTrie()
+        available = []
+        for prefix, check in self.checks.items():
+            is_available = check is None or check()
+            if is_available:
+                available.append(prefix)
+            trie.add(prefix, (prefix, is_available))
+        self._available = available
+        self._trie = trie
+
+    @property
+    def available(self):
+        if self._trie is None:
+            self.refresh()
+        return list(self._available)
+
+    def get_extractor(self, uri):
+        """ uri prefix that selects the stream handler, None if the uri is
+        not recognized """
+        if self._trie is None:
+            self.refresh()
+        match = self._trie.longest_match(uri or "")
+        return match[0] if match else None
+
+    def can_play(self, uri):
+        if self._trie is None:
+            self.refresh()
+        match = self._trie.longest_match(uri or "")
+        return bool(match and match[1])
+
+
+EXTRACTORS = StreamExtractors()
+
+
 def available_extractors():
-    ext = ["/", "http"]
-    if is_deezer_available():
-        ext.append("deezer//")
-    if is_rss_available():
-        ext.append("rss//")
-    if is_ydl_available():
-        ext.append("ydl//")
-    if is_youtube_available():
-        ext.append("youtube//")
-    if is_ytchlive_available():
-        ext.append("youtube.channel.live//")
-    if is_bandcamp_available():
-        ext.append("bandcamp//")
-    return ext
+    return EXTRACTORS.available
+
+
+def refresh_extractors():
+    EXTRACTORS.refresh()
+    return EXTRACTORS.available
+
+
+def get_extractor(uri):
+    return EXTRACTORS.get_extractor(uri)
+
+
+def can_play(uri):
+    return EXTRACTORS.can_play(uri)
@@ -1,6 +1,8 @@
+from ovos_plugin_common_play.ocp.stream_handlers.hedge import hedged
 from ovos_plugin_common_play.ocp.stream_handlers.youtube import \
     get_ydl_stream, YdlBackend
 import enum
+from functools import partial
 
 
 class BandcampBackend(str, enum.Enum):
@@ -9,7 +11,15 @@ class BandcampBackend(str, enum.Enum):
 
 
 def get_bandcamp_audio_stream(url, backend=BandcampBackend.PYBANDCAMP,
-                              fallback=True, ydl_backend=YdlBackend.YDLP):
+                              fallback=True, ydl_backend=YdlBackend.YDLP,
+                              hedge_delay=None):
+    if fallback and hedge_delay is not None:
+        # race the other backend if this one is slow
+        pybandcamp = partial(get_pybandcamp_stream, url)
+        ydl = partial(get_ydl_stream, url, backend=ydl_backend)
+        if backend == BandcampBackend.PYBANDCAMP:
+            return hedged(pybandcamp, ydl, hedge_delay)
+        return hedged(ydl, pybandcamp, hedge_delay)
     try:
         if backend == BandcampBackend.PYBANDCAMP:
             return get_pybandcamp_stream(url)
@@ -0,0 +1,51 @@
+from queue import Queue, Empty
+from threading import Thread
+
+
+def hedged(primary, secondary, delay=0):
+    """ run primary, start secondary if primary failed or did not return
+    after delay seconds (0 -> run both at once), the first valid (truthy)
+    result wins, the slower call keeps running in the background but its
+    result is ignored """
+    results = Queue()
+
+    def run(func):
+        try:
+            results.put((func(), None))
+        except Exception as e:
+            results.put((None, e))
+
+    def start(func):
+        Thread(target=run, args=(func,), daemon=True).start()
+
+    start(primary)
+    pending = 1
+    hedging = False
+    if delay <= 0:
+        start(secondary)
+        pending += 1
+        hedging = True
+
+    error = None
+    while True:
+        try:
+            result, e = results.get(timeout=None if hedging else delay)
+        except Empty:
+            # primary is slow, race the secondary
+            start(secondary)
+            pending += 1
+            hedging = True
+            continue
+        pending -= 1
+        if result:
+            return result
+        error = e or error
+        if not hedging:
+            # primary failed before the delay
+            start(secondary)
+            pending += 1
+            hedging = True
+        elif not pending:
+            if error:
+                raise error
+            return result
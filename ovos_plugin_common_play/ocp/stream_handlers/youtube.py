@@ -1,4 +1,10 @@
 import enum
+import json
+from contextlib import contextmanager
+from threading import Lock
+
+from ovos_plugin_common_play.ocp.stream_handlers.hedge import hedged
+from ovos_utils.log import LOG
 
 
 class YoutubeBackend(str, enum.Enum):
@@ -18,6 +24,66 @@ class YoutubeLiveBackend(str, enum.Enum):
     YT_SEARCHER = "youtube_searcher"
 
 
+class YdlPool:
+    """ reusable YoutubeDL instances per backend and option set
+
+    creating a YoutubeDL object loads every extractor class, slow on
+    low power devices, so instances are kept around after use
+
+    an instance is only used by one thread at a time, concurrent requests
+    get their own instance and up to max_idle of them are kept """
+
+    def __init__(self, max_idle=2):
+        self.max_idle = max_idle
+        self._idle = {}  # (backend, options) -> [YoutubeDL]
+        self._lock = Lock()
+
+    @staticmethod
+    def get_key(backend, ydl_opts):
+        return str(backend), json.dumps(ydl_opts, sort_keys=True, default=str)
+
+    @contextmanager
+    def get(self, youtube_dl, backend, ydl_opts):
+        key = self.get_key(backend, ydl_opts)
+        with self._lock:
+            idle = self._idle.get(key)
+            ydl = idle.pop() if idle else None
+        if ydl is None:
+            ydl = youtube_dl.YoutubeDL(ydl_opts)
+        try:
+            yield ydl
+        except BaseException:
+            # an instance that raised is not reused, its state is unknown
+            self._close(ydl)
+            raise
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(ydl)
+                return
+        self._close(ydl)
+
+    @staticmethod
+    def _close(ydl):
+        """ same cleanup as leaving a "with YoutubeDL()" block, saves
+        cookies and closes the http connections """
+        try:
+            ydl.__exit__(None, None, None)
+        except Exception as e:
+            LOG.debug(f"failed to close YoutubeDL instance: {e}")
+
+    def clear(self):
+        with self._lock:
+            idle = [ydl for instances in self._idle.values()
+                    for ydl in instances]
+            self._idle = {}
+        for ydl in idle:
+            self._close(ydl)
+
+
+YDL_POOL = YdlPool()
+
+
 def _parse_title(title):
     # try to extract_streams artist from title
     delims = ["-", ":", "|"]
@@ -42,7 +108,18 @@ def _parse_title(title):
 
 
 def get_youtube_live_from_channel(url, backend=YoutubeLiveBackend.PYTUBE,
-                                  fallback=True):
+                                  fallback=True, hedge_delay=None):
+    if fallback and hedge_delay is not None:
+        # race the other backend if this one is slow
+        other = YoutubeLiveBackend.YT_SEARCHER \
+            if backend == YoutubeLiveBackend.PYTUBE \
+            else YoutubeLiveBackend.PYTUBE
+        return hedged(
+            lambda: get_youtube_live_from_channel(url, backend,
+                                                  fallback=False),
+            lambda: get_youtube_live_from_channel(url, other,
+                                                  fallback=False),
+            hedge_delay)
     if backend == YoutubeLiveBackend.PYTUBE:
         try:
             for vid in get_pytube_channel_livestreams(url):
@@ -71,14 +148,23 @@ def get_youtube_live_from_channel(url, backend=YoutubeLiveBackend.PYTUBE,
 
 def get_youtube_stream(url, backend=YoutubeBackend.PYTUBE,
                        fallback=True, audio_only=False,
-                       ydl_backend=YdlBackend.YDL, best=True):
+                       ydl_backend=YdlBackend.YDL, best=True,
+                       hedge_delay=None):
+    if fallback and hedge_delay is not None:
+        # race the other backend if this one is slow, each call still
+        # falls back to youtube_dl if the ydl_backend is not installed
+        other = YoutubeBackend.YDL \
+            if backend in [YoutubeBackend.PYTUBE, YoutubeBackend.PAFY] \
+            else YoutubeBackend.PYTUBE
+        return hedged(
+            lambda: _get_youtube_stream(url, backend, audio_only,
+                                        ydl_backend, best),
+            lambda: _get_youtube_stream(url, other, audio_only,
+                                        ydl_backend, best),
+            hedge_delay)
     try:
-        if backend == YoutubeBackend.PYTUBE:
-            return get_pytube_stream(url, best=best, audio_only=audio_only)
-        if backend == YoutubeBackend.PAFY:
-            return get_pafy_stream(url, audio_only=audio_only, best=best)
-        return get_ydl_stream(url, fallback=fallback, backend=ydl_backend,
-                              best=best, audio_only=audio_only)
+        return _get_youtube_stream(url, backend, audio_only, ydl_backend,
+                                   best, ydl_fallback=fallback)
     except:
         if fallback:
             if backend in [YoutubeBackend.PYTUBE, YoutubeBackend.PAFY]:
@@ -91,6 +177,18 @@ def get_youtube_stream(url, backend=YoutubeBackend.PYTUBE,
         raise
 
 
+def _get_youtube_stream(url, backend=YoutubeBackend.PYTUBE, audio_only=False,
+                        ydl_backend=YdlBackend.YDL, best=True,
+                        ydl_fallback=True):
+    """ single backend, no fallback to the other youtube backends """
+    if backend == YoutubeBackend.PYTUBE:
+        return get_pytube_stream(url, best=best, audio_only=audio_only)
+    if backend == YoutubeBackend.PAFY:
+        return get_pafy_stream(url, audio_only=audio_only, best=best)
+    return get_ydl_stream(url, fallback=ydl_fallback, backend=ydl_backend,
+                          best=best, audio_only=audio_only)
+
+
 def is_youtube(url):
     # TODO localization
     if not url:
@@ -133,7 +231,7 @@ def get_ydl_stream(url, preferred_ext=None, backend=YdlBackend.YDLP,
              "title": "title",
              'webpage_url': "url"}
     info = {}
-    with youtube_dl.YoutubeDL(ydl_opts) as ydl:
+    with YDL_POOL.get(youtube_dl, backend, ydl_opts) as ydl:
         meta = ydl.extract_info(url, download=False)
         for k, v in kmaps.items():
             if k in meta:
@@ -0,0 +1,194 @@
+import unittest
+from unittest.mock import patch
+
+from ovos_plugin_common_play.ocp.cache import TTLCache, QueryCache, \
+    StreamCache
+from ovos_plugin_common_play.ocp.status import MediaType
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch("ovos_plugin_common_play.ocp.cache.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class TestTTLCache(CacheTestCase):
+    def test_get_put(self):
+        cache = TTLCache()
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("a", 1), 1)
+        cache.put("a", "value", ttl=10)
+        self.assertEqual(cache.get("a"), "value")
+        self.assertIn("a", cache)
+        self.assertEqual(cache.stats["hits"], 1)
+        self.assertEqual(cache.stats["misses"], 2)
+
+    def test_expiry(self):
+        cache = TTLCache()
+        cache.put("a", "value", ttl=10)
+        self.clock.now += 9
+        self.assertEqual(cache.get("a"), "value")
+        self.clock.now += 1
+        self.assertNotIn("a", cache)
+        self.assertIsNone(cache.get("a"))
+        # expired entries are dropped once looked up
+        self.assertEqual(len(cache), 0)
+
+    def test_no_ttl(self):
+        cache = TTLCache()
+        cache.put("a", "value", ttl=0)
+        cache.put("b", "value", ttl=-5)
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = TTLCache(max_entries=2)
+        cache.put("a", 1, ttl=10)
+        cache.put("b", 2, ttl=10)
+        cache.get("a")  # b is now the least recently used
+        cache.put("c", 3, ttl=10)
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertIn("c", cache)
+        self.assertEqual(cache.evictions, 1)
+
+    def test_memory_cap(self):
+        cache = TTLCache(max_entries=10, max_bytes=100)
+        cache.put("a", 1, ttl=10, size=60)
+        cache.put("b", 2, ttl=10, size=30)
+        self.assertEqual(cache.n_bytes, 90)
+        cache.put("c", 3, ttl=10, size=30)
+        self.assertNotIn("a", cache)
+        self.assertEqual(cache.n_bytes, 60)
+        # never cache something bigger than the cap
+        cache.put("d", 4, ttl=10, size=101)
+        self.assertNotIn("d", cache)
+        self.assertEqual(cache.n_bytes, 60)
+
+    def test_replace_pop_clear(self):
+        cache = TTLCache(max_bytes=100)
+        cache.put("a", 1, ttl=10, size=10)
+        cache.put("a", 2, ttl=10, size=20)
+        self.assertEqual(cache.get("a"), 2)
+        self.assertEqual(cache.n_bytes, 20)
+        self.assertEqual(cache.pop("a"), 2)
+        self.assertIsNone(cache.pop("a"))
+        self.assertEqual(cache.n_bytes, 0)
+        cache.put("b", 1, ttl=10, size=10)
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.n_bytes, 0)
+
+
+class TestQueryCache(CacheTestCase):
+    results = [{"skill_id": "skill.test",
+                "results": [{"uri": "https://example.com/a.mp3",
+                             "match_confidence": 80}]}]
+
+    def test_normalized_key(self):
+        cache = QueryCache()
+        cache.cache_results("The  Beatles ", self.results, MediaType.MUSIC)
+        results, is_stale = cache.get_results("the beatles", MediaType.MUSIC)
+        self.assertEqual(results, self.results)
+        self.assertFalse(is_stale)
+        # media type is part of the key
+        self.assertEqual(cache.get_results("the beatles"), (None, False))
+
+    def test_copies(self):
+        cache = QueryCache()
+        cache.cache_results("song", self.results)
+        results, _ = cache.get_results("song")
+        results[0]["results"].clear()
+        self.assertEqual(cache.get_results("song")[0], self.results)
+
+    def test_stale_while_revalidate(self):
+        cache = QueryCache(ttl=60, stale_ttl=3600)
+        cache.cache_results("song", self.results)
+        self.clock.now += 61
+        results, is_stale = cache.get_results("song")
+        self.assertEqual(results, self.results)
+        self.assertTrue(is_stale)
+        self.assertEqual(cache.stats["stale_hits"], 1)
+        self.clock.now += 3600
+        self.assertEqual(cache.get_results("song"), (None, False))
+
+    def test_no_results(self):
+        cache = QueryCache()
+        cache.cache_results("song", [])
+        self.assertEqual(len(cache), 0)
+
+
+class TestStreamCache(CacheTestCase):
+    meta = {"uri": "https://example.com/stream.mp3", "title": "song"}
+
+    def test_key(self):
+        cache = StreamCache()
+        cache.cache_stream("youtube//https://youtu.be/x", self.meta,
+                           extractor="youtube//", backend="pytube")
+        self.assertEqual(
+            cache.get_stream("youtube//https://youtu.be/x", "pytube"),
+            self.meta)
+        # other backend or video streams are cached separately
+        self.assertIsNone(
+            cache.get_stream("youtube//https://youtu.be/x", "pafy"))
+        self.assertIsNone(
+            cache.get_stream("youtube//https://youtu.be/x", "pytube",
+                             audio_only=False))
+
+    def test_copies(self):
+        cache = StreamCache()
+        meta = dict(self.meta)
+        cache.cache_stream("rss//x", meta, extractor="rss//")
+        meta["title"] = "changed"
+        cached = cache.get_stream("rss//x")
+        cached["uri"] = "changed"
+        self.assertEqual(cache.get_stream("rss//x"), self.meta)
+
+    def test_get_expiry(self):
+        get_expiry = StreamCache.get_expiry
+        self.assertEqual(get_expiry(
+            "https://r1.googlevideo.com/videoplayback?expire=1650000000&id=1"),
+            1650000000)
+        self.assertEqual(get_expiry(
+            "https://manifest.googlevideo.com/api/manifest/hls_playlist/"
+            "expire/1650000000/ei/x/index.m3u8"), 1650000000)
+        self.assertIsNone(get_expiry("https://example.com/a.mp3?expire=1"))
+        self.assertIsNone(get_expiry(None))
+
+    def test_signed_url_ttl(self):
+        cache = StreamCache(margin=60)
+        self.clock.now = 1650000000
+        expire = 1650000600
+        meta = {"uri": f"https://r1.googlevideo.com/videoplayback?"
+                       f"expire={expire}"}
+        self.assertEqual(cache.get_ttl(meta, "youtube//"), 540)
+        cache.cache_stream("youtube//x", meta, extractor="youtube//")
+        self.clock.now += 539
+        self.assertIsNotNone(cache.get_stream("youtube//x"))
+        # not served once it is about to expire
+        self.clock.now += 1
+        self.assertIsNone(cache.get_stream("youtube//x"))
+
+    def test_default_ttl(self):
+        cache = StreamCache()
+        cache.cache_stream("rss//x", self.meta, extractor="rss//")
+        self.clock.now += 899
+        self.assertIsNotNone(cache.get_stream("rss//x"))
+        self.clock.now += 1
+        self.assertIsNone(cache.get_stream("rss//x"))
+        # unknown extractors, eg. plain http streams, are not cached
+        cache.cache_stream("https://x.com/a.mp3", self.meta)
+        self.assertIsNone(cache.get_stream("https://x.com/a.mp3"))
+
+
+if __name__ == '__main__':
+    unittest.main()
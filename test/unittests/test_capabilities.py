@@ -0,0 +1,94 @@
+import tempfile
+import unittest
+from os.path import join
+from unittest.mock import patch
+
+from json_database import JsonStorage
+
+from ovos_plugin_common_play.ocp.capabilities import SkillCapabilities
+from ovos_plugin_common_play.ocp.stats import SkillSearchStats
+from ovos_plugin_common_play.ocp.status import MediaType
+
+
+class TestSkillCapabilities(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.mkdtemp()
+
+        def storage(name, subfolder=None):
+            return JsonStorage(join(folder, f"{name}.json"))
+
+        patcher = patch("ovos_plugin_common_play.ocp.stats.JsonStorageXDG",
+                        storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.stats = SkillSearchStats()
+        self.capabilities = SkillCapabilities(self.stats, min_samples=3)
+
+    def learn(self, skill_id, media_type, hits, misses=0):
+        self.capabilities.seen(skill_id)
+        for _ in range(hits):
+            self.stats.record(skill_id, media_type, 0.5, hit=True)
+        for _ in range(misses):
+            self.stats.record(skill_id, media_type, 0.5, hit=False)
+
+    def test_declared(self):
+        caps = self.capabilities
+        caps.seen("skill.music")
+        caps.seen("skill.movies")
+        caps.seen("skill.any")
+        caps.declare("skill.music", [MediaType.MUSIC, MediaType.PODCAST])
+        caps.declare("skill.movies", [MediaType.MOVIE])
+        caps.declare("skill.any", [MediaType.GENERIC])
+        self.assertEqual(caps.get_targets(MediaType.MUSIC),
+                         ["skill.any", "skill.music"])
+        self.assertEqual(caps.get_targets(MediaType.MOVIE),
+                         ["skill.any", "skill.movies"])
+        self.assertEqual(caps.get_media_types("skill.music"),
+                         {MediaType.MUSIC, MediaType.PODCAST})
+
+    def test_generic_broadcast(self):
+        self.capabilities.seen("skill.music")
+        self.capabilities.declare("skill.music", [MediaType.MUSIC])
+        self.assertIsNone(self.capabilities.get_targets(MediaType.GENERIC))
+
+    def test_learned(self):
+        self.learn("skill.music", MediaType.MUSIC, hits=3)
+        self.learn("skill.news", MediaType.MUSIC, hits=0, misses=3)
+        self.learn("skill.news", MediaType.NEWS, hits=3)
+        self.assertEqual(self.capabilities.get_targets(MediaType.MUSIC),
+                         ["skill.music"])
+        self.assertEqual(self.capabilities.get_media_types("skill.news"),
+                         {MediaType.NEWS})
+
+    def test_exploration(self):
+        self.capabilities.seen("skill.music")
+        self.capabilities.declare("skill.music", [MediaType.MUSIC])
+        # a new skill was seen, it is queried until it is known
+        self.learn("skill.new", MediaType.MUSIC, hits=0, misses=2)
+        self.assertIsNone(self.capabilities.get_targets(MediaType.MUSIC))
+        self.learn("skill.new", MediaType.MUSIC, hits=0, misses=1)
+        self.assertEqual(self.capabilities.get_targets(MediaType.MUSIC),
+                         ["skill.music"])
+        # unknown for another media type, still broadcast there
+        self.assertIsNone(self.capabilities.get_targets(MediaType.MOVIE))
+
+    def test_no_targets(self):
+        self.learn("skill.music", MediaType.MUSIC, hits=0, misses=3)
+        self.assertIsNone(self.capabilities.get_targets(MediaType.MUSIC))
+
+    def test_remove(self):
+        caps = self.capabilities
+        caps.seen("skill.music")
+        caps.declare("skill.music", [MediaType.MUSIC])
+        caps.seen("skill.unknown")
+        self.assertIsNone(caps.get_targets(MediaType.MUSIC))
+        # unloaded skills no longer force a broadcast
+        caps.remove("skill.unknown")
+        self.assertEqual(caps.get_targets(MediaType.MUSIC), ["skill.music"])
+        caps.remove("skill.music")
+        self.assertEqual(caps.declared_skills, [])
+        self.assertIsNone(caps.get_targets(MediaType.MUSIC))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import unittest
+
+from ovos_plugin_common_play.ocp.stream_handlers import PrefixTrie, \
+    StreamExtractors
+
+
+class TestPrefixTrie(unittest.TestCase):
+    def test_longest_match(self):
+        trie = PrefixTrie()
+        trie.add("youtube//", "youtube")
+        trie.add("youtube.channel.live//", "live")
+        trie.add("http", "http")
+        self.assertEqual(trie.longest_match("youtube//https://youtu.be/x"),
+                         "youtube")
+        self.assertEqual(
+            trie.longest_match("youtube.channel.live//https://youtube.com/c"),
+            "live")
+        self.assertEqual(trie.longest_match("https://example.com/a.mp3"),
+                         "http")
+
+    def test_no_match(self):
+        trie = PrefixTrie()
+        trie.add("rss//", "rss")
+        self.assertIsNone(trie.longest_match("rs"))
+        self.assertIsNone(trie.longest_match("deezer//x"))
+        self.assertIsNone(trie.longest_match(""))
+        self.assertIsNone(PrefixTrie().longest_match("rss//x"))
+
+    def test_nested_prefixes(self):
+        trie = PrefixTrie()
+        trie.add("a", 1)
+        trie.add("abc", 3)
+        self.assertEqual(trie.longest_match("ab"), 1)
+        self.assertEqual(trie.longest_match("abcd"), 3)
+        # the same prefix added again replaces the value
+        trie.add("a", 2)
+        self.assertEqual(trie.longest_match("ab"), 2)
+
+
+class TestStreamExtractors(unittest.TestCase):
+    def setUp(self):
+        self.extractors = StreamExtractors()
+        self.extractors.checks = {
+            "/": None,
+            "http": None,
+            "ydl//": lambda: False,
+            "youtube//": lambda: True
+        }
+
+    def test_get_extractor(self):
+        get = self.extractors.get_extractor
+        self.assertEqual(get("/home/music/song.mp3"), "/")
+        self.assertEqual(get("https://example.com/song.mp3"), "http")
+        self.assertEqual(get("ydl//https://example.com"), "ydl//")
+        self.assertEqual(get("youtube//https://youtu.be/x"), "youtube//")
+        self.assertIsNone(get("bandcamp//https://x.bandcamp.com"))
+        self.assertIsNone(get(None))
+
+    def test_can_play(self):
+        can_play = self.extractors.can_play
+        self.assertTrue(can_play("/home/music/song.mp3"))
+        self.assertTrue(can_play("youtube//https://youtu.be/x"))
+        # known prefix, missing dependency
+        self.assertFalse(can_play("ydl//https://example.com"))
+        self.assertFalse(can_play("bandcamp//https://x.bandcamp.com"))
+
+    def test_available(self):
+        self.assertEqual(self.extractors.available,
+                         ["/", "http", "youtube//"])
+        self.extractors.checks["ydl//"] = lambda: True
+        # availability is cached until refreshed
+        self.assertFalse(self.extractors.can_play("ydl//https://x.com"))
+        self.extractors.refresh()
+        self.assertTrue(self.extractors.can_play("ydl//https://x.com"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import random
+import unittest
+
+from ovos_plugin_common_play.ocp.gui import GUIChangeTracker
+
+
+def track(i, **kwargs):
+    return dict({"uri": f"https://example.com/{i}.mp3",
+                 "title": f"track {i}"}, **kwargs)
+
+
+def apply_splices(entries, splices):
+    entries = list(entries)
+    for s in splices:
+        entries[s["start"]:s["start"] + s["remove"]] = s["insert"]
+    return entries
+
+
+class TestGetSplices(unittest.TestCase):
+    def check(self, old, new):
+        splices = GUIChangeTracker._get_splices(old, new)
+        self.assertEqual(apply_splices(old, splices), new)
+        return splices
+
+    def test_unchanged(self):
+        old = [track(i) for i in range(5)]
+        self.assertEqual(self.check(old, list(old)), [])
+
+    def test_append(self):
+        old = [track(i) for i in range(5)]
+        splices = self.check(old, old + [track(5), track(6)])
+        self.assertEqual(splices, [{"start": 5, "remove": 0,
+                                    "insert": [track(5), track(6)]}])
+
+    def test_remove(self):
+        old = [track(i) for i in range(5)]
+        splices = self.check(old, old[:2] + old[3:])
+        self.assertEqual(splices, [{"start": 2, "remove": 1, "insert": []}])
+
+    def test_field_update(self):
+        old = [track(i) for i in range(5)]
+        new = list(old)
+        new[3] = track(3, image="cover.png")
+        splices = self.check(old, new)
+        self.assertEqual(splices, [{"start": 3, "remove": 1,
+                                    "insert": [new[3]]}])
+
+    def test_insert_before_update(self):
+        old = [track(i) for i in range(5)]
+        new = old[:2] + [track(9), track(2, image="cover.png")] + old[3:]
+        self.check(old, new)
+
+    def test_reverse_order(self):
+        old = [track(i) for i in range(10)]
+        new = [track(0)] + old[2:5] + [track(5, image="x")] + old[6:] + \
+            [track(10)]
+        splices = self.check(old, new)
+        starts = [s["start"] for s in splices]
+        self.assertEqual(starts, sorted(starts, reverse=True))
+
+    def test_random_changes(self):
+        rng = random.Random(42)
+        for _ in range(200):
+            old = [track(i) for i in range(rng.randint(0, 15))]
+            new = list(old)
+            for _ in range(rng.randint(1, 5)):
+                op = rng.choice(["insert", "remove", "update"])
+                if op == "insert" or not new:
+                    new.insert(rng.randint(0, len(new)),
+                               track(rng.randint(100, 200)))
+                elif op == "remove":
+                    new.pop(rng.randrange(len(new)))
+                else:
+                    i = rng.randrange(len(new))
+                    new[i] = dict(new[i], image=str(rng.random()))
+            self.check(old, new)
+
+
+class TestGUIChangeTracker(unittest.TestCase):
+    def test_diff(self):
+        tracker = GUIChangeTracker(max_changes=0.5)
+        model = {"data": [track(i) for i in range(10)], "position": 0}
+        # nothing published yet
+        self.assertEqual(tracker.diff("playlist", model), model)
+        tracker.publish("playlist", model)
+        self.assertIsNone(tracker.diff("playlist", dict(model)))
+        updated = {"data": model["data"] + [track(10)], "position": 0}
+        self.assertEqual(tracker.diff("playlist", updated),
+                         [{"start": 10, "remove": 0,
+                           "insert": [track(10)]}])
+        # too many changes, the whole model is sent
+        replaced = {"data": [track(i) for i in range(20, 30)],
+                    "position": 0}
+        self.assertEqual(tracker.diff("playlist", replaced), replaced)
+        # other values are never spliced
+        tracker.publish("title", "song")
+        self.assertEqual(tracker.diff("title", "other"), "other")
+        tracker.reset()
+        self.assertEqual(tracker.diff("playlist", model), model)
+
+
+if __name__ == '__main__':
+    unittest.main()
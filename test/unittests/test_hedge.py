@@ -0,0 +1,106 @@
+import time
+import unittest
+from threading import Event
+from unittest.mock import patch
+
+from ovos_plugin_common_play.ocp.settings import OCPSettings
+from ovos_plugin_common_play.ocp.stream_handlers.hedge import hedged
+from ovos_plugin_common_play.ocp.stream_handlers.youtube import \
+    get_youtube_stream, YoutubeBackend
+
+
+class TestHedged(unittest.TestCase):
+    def setUp(self):
+        self.release = Event()
+        # unblock calls left running in the background
+        self.addCleanup(self.release.set)
+
+    def slow(self, value):
+        def func():
+            self.release.wait(5)
+            return value
+        return func
+
+    @staticmethod
+    def fail(exc=ValueError):
+        def func():
+            raise exc("failed")
+        return func
+
+    def test_primary_wins(self):
+        secondary_called = Event()
+
+        def secondary():
+            secondary_called.set()
+            return "secondary"
+
+        self.assertEqual(hedged(lambda: "primary", secondary, delay=1),
+                         "primary")
+        # secondary only starts if the primary is slow
+        self.assertFalse(secondary_called.is_set())
+
+    def test_slow_primary(self):
+        start = time.time()
+        result = hedged(self.slow("primary"), lambda: "secondary",
+                        delay=0.1)
+        self.assertEqual(result, "secondary")
+        self.assertLess(time.time() - start, 1)
+
+    def test_failed_primary(self):
+        start = time.time()
+        result = hedged(self.fail(), lambda: "secondary", delay=5)
+        self.assertEqual(result, "secondary")
+        # does not wait for the delay
+        self.assertLess(time.time() - start, 1)
+
+    def test_no_delay(self):
+        result = hedged(self.slow("primary"), lambda: "secondary")
+        self.assertEqual(result, "secondary")
+
+    def test_empty_result(self):
+        # falsy results do not win the race
+        self.assertEqual(hedged(lambda: None, lambda: "secondary",
+                                delay=5), "secondary")
+        self.assertEqual(hedged(lambda: {}, lambda: {}), {})
+
+    def test_both_fail(self):
+        with self.assertRaises(KeyError):
+            hedged(self.fail(KeyError), self.fail(KeyError), delay=0.1)
+        with self.assertRaises(ValueError):
+            hedged(lambda: None, self.fail(ValueError))
+
+
+class TestHedgeDelay(unittest.TestCase):
+    def test_settings(self):
+        settings = OCPSettings()
+        # hedging is opt-in
+        settings.pop("youtube_hedge_delay", None)
+        self.assertIsNone(settings.youtube_hedge_delay)
+        settings["youtube_hedge_delay"] = -1
+        self.assertIsNone(settings.youtube_hedge_delay)
+        settings["youtube_hedge_delay"] = 0
+        self.assertEqual(settings.youtube_hedge_delay, 0)
+        settings["youtube_hedge_delay"] = 2.5
+        self.assertEqual(settings.youtube_hedge_delay, 2.5)
+
+    def test_sequential_fallback(self):
+        calls = []
+
+        def extract(url, backend, *args, **kwargs):
+            calls.append(backend)
+            if backend == YoutubeBackend.PYTUBE:
+                raise ValueError("failed")
+            return {"uri": "stream"}
+
+        with patch("ovos_plugin_common_play.ocp.stream_handlers.youtube."
+                   "_get_youtube_stream", extract), \
+                patch("ovos_plugin_common_play.ocp.stream_handlers.youtube."
+                      "hedged") as hedge:
+            self.assertEqual(get_youtube_stream("url"), {"uri": "stream"})
+            hedge.assert_not_called()
+        # the alternate backend only runs after the first one failed
+        self.assertEqual(calls, [YoutubeBackend.PYTUBE, YoutubeBackend.YDL])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import tempfile
+import unittest
+from os.path import join
+from unittest.mock import patch
+
+from json_database import JsonStorage
+
+from ovos_plugin_common_play.ocp.history import PlayHistory
+
+
+class TestPlayHistory(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.mkdtemp()
+
+        def storage(name, subfolder=None):
+            return JsonStorage(join(folder, f"{name}.json"))
+
+        patcher = patch("ovos_plugin_common_play.ocp.history.JsonStorageXDG",
+                        storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_record(self):
+        history = PlayHistory()
+        history.record("a", skill_id="skill.a", title="song a")
+        history.record("b")
+        history.record("a")
+        history.record(None)
+        self.assertEqual(len(history), 2)
+        self.assertEqual(history.play_count("a"), 2)
+        self.assertEqual(history.play_count("c"), 0)
+        # missing metadata does not erase the known one
+        self.assertEqual(history.get("a")["skill_id"], "skill.a")
+        self.assertEqual(history.get("a")["title"], "song a")
+
+    def test_recent(self):
+        history = PlayHistory()
+        for uri in ["a", "b", "c", "a"]:
+            history.record(uri)
+        self.assertEqual([r["uri"] for r in history.recent()],
+                         ["a", "c", "b"])
+        self.assertEqual([r["uri"] for r in history.recent(1)], ["a"])
+
+    def test_most_played(self):
+        history = PlayHistory()
+        for uri in ["a", "b", "b", "c", "c", "d"]:
+            history.record(uri)
+        # ties are sorted by most recent
+        self.assertEqual([r["uri"] for r in history.most_played()],
+                         ["c", "b", "d", "a"])
+        self.assertEqual([r["uri"] for r in history.most_played(2)],
+                         ["c", "b"])
+
+    def test_lru_eviction(self):
+        history = PlayHistory(max_entries=2)
+        for uri in ["a", "a", "b", "c"]:
+            history.record(uri)
+        self.assertNotIn("a", history)
+        self.assertIn("b", history)
+        self.assertIn("c", history)
+
+    def test_lfu_eviction(self):
+        history = PlayHistory(max_entries=2, policy="lfu")
+        for uri in ["a", "a", "b", "c"]:
+            history.record(uri)
+        self.assertIn("a", history)
+        self.assertNotIn("b", history)
+        self.assertIn("c", history)
+
+    def test_store(self):
+        history = PlayHistory()
+        history.record("a", skill_id="skill.a")
+        history.record("b")
+        history.record("a")
+        history.store()
+        loaded = PlayHistory()
+        self.assertEqual(len(loaded), 2)
+        self.assertEqual(loaded.play_count("a"), 2)
+        self.assertEqual([r["uri"] for r in loaded.recent()], ["a", "b"])
+
+    def test_cap_on_load(self):
+        history = PlayHistory()
+        for uri in ["a", "b", "c", "d"]:
+            history.record(uri)
+        history.store()
+        self.assertEqual(len(PlayHistory(max_entries=2)), 2)
+        loaded = PlayHistory()
+        loaded.configure(max_entries=3)
+        self.assertEqual([r["uri"] for r in loaded.recent()],
+                         ["d", "c", "b"])
+
+    def test_schedule_store(self):
+        history = PlayHistory()
+        history.record("a")
+        with patch.object(history, "store") as store:
+            history.schedule_store(delay=0.05)
+            timer = history._store_timer
+            # plays in between are saved together
+            history.schedule_store(delay=0.05)
+            self.assertIs(history._store_timer, timer)
+            timer.join(1)
+            store.assert_called_once()
+        # store cancels a pending save
+        history._store_timer = None
+        history.schedule_store(delay=10)
+        history.store()
+        self.assertIsNone(history._store_timer)
+        self.assertEqual(PlayHistory().play_count("a"), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
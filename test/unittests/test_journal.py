@@ -0,0 +1,77 @@
+import tempfile
+import unittest
+
+from ovos_plugin_common_play.ocp.journal import PlayerJournal
+
+
+class TestPlayerJournal(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def get_journal(self, **kwargs):
+        journal = PlayerJournal(folder=self.folder, **kwargs)
+        self.addCleanup(journal.close)
+        return journal
+
+    def test_empty(self):
+        self.assertEqual(self.get_journal().load(), {})
+
+    def test_replay(self):
+        journal = self.get_journal()
+        journal.record("playlist", [{"uri": "a"}])
+        journal.record("playlist.extend", [{"uri": "b"}, {"uri": "c"}])
+        journal.record("playlist_position", 1)
+        journal.record("playlist_position", 2)
+        journal.record("shuffle", True)
+        journal.close()
+        journal = self.get_journal()
+        state = journal.load()
+        self.assertEqual(state, {
+            "playlist": [{"uri": "a"}, {"uri": "b"}, {"uri": "c"}],
+            "playlist_position": 2,
+            "shuffle": True})
+        self.assertEqual(journal.n_records, 5)
+
+    def test_compact(self):
+        journal = self.get_journal(max_records=2)
+        journal.record("playlist", [{"uri": "a"}])
+        self.assertFalse(journal.needs_compaction)
+        journal.record("playlist_position", 0)
+        self.assertTrue(journal.needs_compaction)
+        journal.compact({"playlist": [{"uri": "a"}],
+                         "playlist_position": 0})
+        self.assertEqual(journal.n_records, 0)
+        # records after the snapshot are replayed on top of it
+        journal.record("playlist.extend", [{"uri": "b"}])
+        journal.close()
+        journal = self.get_journal()
+        self.assertEqual(journal.load(),
+                         {"playlist": [{"uri": "a"}, {"uri": "b"}],
+                          "playlist_position": 0})
+        self.assertEqual(journal.n_records, 1)
+
+    def test_partial_record(self):
+        journal = self.get_journal()
+        journal.record("loop_state", 1)
+        journal.close()
+        # power loss in the middle of a write
+        with open(journal.journal_path, "a") as f:
+            f.write('["shuffle",tr')
+        journal = self.get_journal()
+        self.assertEqual(journal.load(), {"loop_state": 1})
+        # new records do not end up in the broken line
+        journal.record("shuffle", True)
+        journal.close()
+        self.assertEqual(self.get_journal().load(),
+                         {"loop_state": 1, "shuffle": True})
+
+    def test_corrupt_snapshot(self):
+        journal = self.get_journal()
+        with open(journal.snapshot_path, "w") as f:
+            f.write("{not json")
+        journal.record("shuffle", False)
+        self.assertEqual(journal.load(), {"shuffle": False})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+import tempfile
+import unittest
+from os.path import join
+from unittest.mock import patch
+
+from json_database import JsonStorage
+
+from ovos_plugin_common_play.ocp.journal import PlayerJournal
+from ovos_plugin_common_play.ocp.player import OCPMediaPlayer
+from ovos_plugin_common_play.ocp.settings import OCPSettings
+from ovos_plugin_common_play.ocp.status import PlaybackType
+from ovos_utils.messagebus import FakeBus
+
+
+def track(i):
+    return {"uri": f"youtube//https://youtube.com/watch?v={i}",
+            "title": f"track {i}", "skill_id": "skill.test",
+            "match_confidence": 80, "playback": PlaybackType.AUDIO}
+
+
+class PlayerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+        def storage(name, subfolder=None):
+            return JsonStorage(join(self.folder, f"{name}.json"))
+
+        for module in ("history", "stats"):
+            patcher = patch(f"ovos_plugin_common_play.ocp.{module}."
+                            f"JsonStorageXDG", storage)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        settings = OCPSettings()
+        settings["persist_state"] = False
+        settings["stream_cache"] = False
+        settings["backwards_compatibility"] = False
+        self.player = OCPMediaPlayer(bus=FakeBus(), settings=settings)
+        self.addCleanup(self.player.shutdown)
+
+    def resolve(self):
+        """ what extract_stream does, replace the uri with a signed url """
+        self.player.now_playing.uri = \
+            "https://r1.googlevideo.com/videoplayback?expire=1650000000"
+        return True
+
+
+class TestPlayHistory(PlayerTestCase):
+    def test_record_original_uri(self):
+        with patch.object(self.player, "validate_stream", self.resolve):
+            self.player.play_media(track(1))
+            self.player.play_media(track(1))
+        uri = track(1)["uri"]
+        self.assertEqual(self.player.history.play_count(uri), 2)
+        self.assertEqual([r["uri"] for r in self.player.history.recent()],
+                         [uri])
+
+
+class TestRestoreState(PlayerTestCase):
+    def test_restore(self):
+        player = self.player
+        player.journal = PlayerJournal(folder=self.folder)
+        with patch.object(player, "validate_stream", self.resolve):
+            player.play_media(track(1), playlist=[track(0), track(1),
+                                                  track(2)])
+        player.shuffle = True
+        player.persist_state()
+        state = player.get_state()
+        # the resolved stream was saved too
+        self.assertTrue(state["now_playing"]["uri"].startswith(
+            "https://r1.googlevideo.com"))
+        player.journal.close()
+
+        restored = OCPMediaPlayer(bus=FakeBus(), settings=player.settings)
+        self.addCleanup(restored.shutdown)
+        restored.journal = PlayerJournal(folder=self.folder)
+        restored.restore_state()
+        self.assertEqual([e.uri for e in restored.playlist],
+                         [track(i)["uri"] for i in range(3)])
+        self.assertEqual(restored.playlist.position, 1)
+        self.assertTrue(restored.shuffle)
+        # resumes from the track uri, not the expired stream
+        self.assertEqual(restored.now_playing.uri, track(1)["uri"])
+        self.assertEqual(restored.now_playing.title, "track 1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,191 @@
+import unittest
+
+from ovos_plugin_common_play.ocp.media import Playlist, MediaEntry
+
+
+def track(i):
+    return {"uri": f"https://example.com/{i}.mp3", "title": f"track {i}"}
+
+
+def playlist_entry(name, *tracks):
+    return {"title": name, "playlist": [track(i) for i in tracks]}
+
+
+class TestPlaylistIndex(unittest.TestCase):
+    def check_index(self, pl):
+        """ compares the incremental indexes with a full rebuild """
+        uris, nested, titles = {}, {}, {}
+        for idx, e in enumerate(pl):
+            if e.uri:
+                uris.setdefault(e.uri, idx)
+            elif e.data.get("playlist"):
+                titles.setdefault(e.title, idx)
+                for t in e.data["playlist"]:
+                    nested.setdefault(t["uri"], idx)
+        self.assertEqual(pl._uri_index, uris)
+        self.assertEqual(pl._nested_index, nested)
+        self.assertEqual(pl._title_index, titles)
+        for idx, e in enumerate(pl):
+            self.assertIn(e, pl)
+            # duplicates point to the first occurrence
+            self.assertEqual(pl.index_of(e), uris.get(e.uri) if e.uri
+                             else titles.get(e.title))
+            self.assertLessEqual(pl.index_of(e), idx)
+
+    def get_playlist(self, n=5):
+        pl = Playlist([track(i) for i in range(n)])
+        self.check_index(pl)
+        return pl
+
+    def test_append(self):
+        pl = self.get_playlist()
+        pl.append(track(5))
+        pl.extend([track(6), playlist_entry("list", 7, 8)])
+        pl += [track(9)]
+        self.check_index(pl)
+        self.assertEqual(pl.index_of(track(9)), 8)
+        self.assertEqual(pl.index_of({"title": "list"}), 7)
+        self.assertIn(track(7), pl)
+        self.assertNotIn(track(10), pl)
+
+    def test_insert(self):
+        pl = self.get_playlist()
+        pl.insert(0, track(10))
+        pl.insert(-1, playlist_entry("list", 11))
+        pl.insert(100, track(12))
+        self.check_index(pl)
+        self.assertEqual(pl.index_of(track(0)), 1)
+        self.assertEqual(pl.index_of(track(12)), 7)
+        pl.add_entry(track(13), 2)
+        self.check_index(pl)
+        self.assertEqual(pl.index_of(track(13)), 2)
+
+    def test_pop(self):
+        pl = self.get_playlist()
+        pl.pop()
+        pl.pop(0)
+        self.check_index(pl)
+        self.assertNotIn(track(0), pl)
+        self.assertNotIn(track(4), pl)
+        self.assertEqual(pl.index_of(track(1)), 0)
+        del pl[1]
+        self.check_index(pl)
+        self.assertEqual(pl.index_of(track(3)), 1)
+
+    def test_remove(self):
+        pl = self.get_playlist()
+        pl.append(playlist_entry("list", 10))
+        pl.remove(pl[1])
+        self.check_index(pl)
+        self.assertNotIn(track(1), pl)
+        pl.remove_entry(track(3))
+        pl.remove_entry(0)
+        self.check_index(pl)
+        self.assertEqual([e.uri for e in pl.entries[:2]],
+                         [track(2)["uri"], track(4)["uri"]])
+        pl.remove_entry({"title": "list"})
+        self.check_index(pl)
+        self.assertNotIn(track(10), pl)
+        with self.assertRaises(ValueError):
+            pl.remove_entry(track(1))
+
+    def test_replace(self):
+        pl = self.get_playlist()
+        pl.replace([track(i) for i in range(10, 13)])
+        self.check_index(pl)
+        self.assertNotIn(track(0), pl)
+        self.assertEqual(pl.index_of(track(12)), 2)
+        pl.clear()
+        self.check_index(pl)
+        self.assertIsNone(pl.index_of(track(10)))
+
+    def test_slicing(self):
+        pl = self.get_playlist(10)
+        pl[2:5] = [track(20)]
+        self.check_index(pl)
+        self.assertEqual(pl.index_of(track(5)), 3)
+        self.assertNotIn(track(3), pl)
+        pl[0] = track(21)
+        self.check_index(pl)
+        self.assertNotIn(track(0), pl)
+        del pl[::2]
+        self.check_index(pl)
+        pl.reverse()
+        self.check_index(pl)
+        pl.sort(key=lambda e: e.uri)
+        self.check_index(pl)
+
+    def test_duplicates(self):
+        pl = Playlist([track(0), track(1), track(0)])
+        self.check_index(pl)
+        self.assertEqual(pl.index_of(track(0)), 0)
+        pl.pop(0)
+        self.check_index(pl)
+        self.assertEqual(pl.index_of(track(0)), 1)
+
+    def test_goto_track(self):
+        pl = self.get_playlist()
+        pl.goto_track(track(3))
+        self.assertEqual(pl.position, 3)
+        pl.goto_track(MediaEntry.from_dict(track(1)))
+        self.assertEqual(pl.position, 1)
+        pl.insert(0, track(10))
+        pl.goto_track(track(1))
+        self.assertEqual(pl.position, 2)
+        # unknown tracks keep the position
+        pl.goto_track(track(20))
+        self.assertEqual(pl.position, 2)
+
+
+class TestPlaylistEntries(unittest.TestCase):
+    def test_normalize(self):
+        source = track(0)
+        pl = Playlist([source])
+        pl.append(track(1))
+        pl.insert(0, track(2))
+        pl.add_entry(track(3), 1)
+        pl[0] = track(4)
+        pl[1:2] = [track(5), track(6)]
+        pl += [track(7)]
+        self.assertTrue(all(isinstance(e, MediaEntry) for e in pl))
+        self.assertEqual(len(pl.entries), len(pl))
+        # the caller's dict is not modified
+        self.assertEqual(source, track(0))
+        # entries are not converted again
+        entry = MediaEntry.from_dict(track(8))
+        pl.append(entry)
+        self.assertIs(pl[-1], entry)
+
+    def test_entries_cache(self):
+        pl = Playlist([track(i) for i in range(5)])
+        entries = pl.entries
+        self.assertIsInstance(entries, tuple)
+        self.assertIs(pl.entries, entries)
+        # reads and position changes keep the cached view
+        pl.set_position(2)
+        self.assertIn(track(1), pl)
+        self.assertIs(pl.entries, entries)
+
+        mutations = [
+            lambda: pl.append(track(10)),
+            lambda: pl.insert(0, track(11)),
+            lambda: pl.pop(),
+            lambda: pl.remove(pl[0]),
+            lambda: pl.remove_entry(track(1)),
+            lambda: pl.__setitem__(0, track(12)),
+            lambda: pl.__setitem__(slice(0, 2), [track(13)]),
+            lambda: pl.__delitem__(0),
+            lambda: pl.reverse(),
+            lambda: pl.sort_by_conf(),
+            lambda: pl.replace([track(14), track(15)]),
+            lambda: pl.clear()
+        ]
+        for mutate in mutations:
+            entries = pl.entries
+            mutate()
+            self.assertIsNot(pl.entries, entries)
+            self.assertEqual(list(pl.entries), list(pl))
+
+
+if __name__ == '__main__':
+    unittest.main()
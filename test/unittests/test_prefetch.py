@@ -0,0 +1,197 @@
+import time
+import unittest
+from threading import Event, Lock
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from ovos_plugin_common_play.ocp.media import Playlist
+from ovos_plugin_common_play.ocp.prefetch import StreamPrefetcher
+from ovos_plugin_common_play.ocp.status import LoopState, PlaybackType
+
+
+def track(i, **kwargs):
+    return dict({"uri": f"youtube//https://youtube.com/watch?v={i}",
+                 "title": f"track {i}",
+                 "playback": PlaybackType.AUDIO}, **kwargs)
+
+
+def uri(i):
+    return track(i)["uri"]
+
+
+class FakePlayer(SimpleNamespace):
+    @property
+    def tracks(self):
+        return self.playlist.entries
+
+    @property
+    def disambiguation(self):
+        return self.media.search_playlist.entries
+
+
+def get_player(n=5, **settings):
+    settings = dict({"merge_search": False, "prefetch_tracks": 2,
+                     "prefetch_search_results": 2}, **settings)
+    return FakePlayer(
+        playlist=Playlist([track(i) for i in range(n)]),
+        media=SimpleNamespace(search_playlist=Playlist()),
+        settings=SimpleNamespace(**settings),
+        loop_state=LoopState.NONE, shuffle=False,
+        stream_cache=object())
+
+
+class PrefetcherTestCase(unittest.TestCase):
+    """ StreamPrefetcher with a single worker and a resolve_stream that
+    blocks until released """
+
+    def setUp(self):
+        self.resolved = []
+        self.started = Event()
+        self.release = Event()
+        self._lock = Lock()
+        patcher = patch("ovos_plugin_common_play.ocp.prefetch.resolve_stream",
+                        self.resolve)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.release.set)
+        self.player = get_player()
+        self.prefetcher = StreamPrefetcher(self.player, workers=1)
+        self.addCleanup(self.prefetcher.shutdown)
+
+    def resolve(self, uri, settings, video=False, cache=None):
+        self.started.set()
+        self.release.wait(5)
+        with self._lock:
+            self.resolved.append(uri)
+
+    def block(self):
+        """ keep the worker busy so new requests stay queued """
+        self.prefetcher.prefetch(
+            Playlist([track("busy")]).entries, "busy")
+        self.assertTrue(self.started.wait(1))
+
+    def wait_resolved(self, n, timeout=2):
+        deadline = time.time() + timeout
+        while len(self.resolved) < n and time.time() < deadline:
+            time.sleep(0.01)
+        # give the worker a chance to resolve more than expected
+        time.sleep(0.05)
+        return [u for u in self.resolved if u != uri("busy")]
+
+
+class TestGetUpcoming(PrefetcherTestCase):
+    def test_sequential(self):
+        self.player.playlist.set_position(1)
+        self.assertEqual([e.uri for e in self.prefetcher.get_upcoming(2)],
+                         [uri(2), uri(3)])
+        self.player.playlist.set_position(4)
+        self.assertEqual(self.prefetcher.get_upcoming(2), [])
+
+    def test_repeat(self):
+        self.player.playlist.set_position(4)
+        self.player.loop_state = LoopState.REPEAT
+        self.assertEqual([e.uri for e in self.prefetcher.get_upcoming(2)],
+                         [uri(0), uri(1)])
+        self.player.playlist.set_position(3)
+        self.assertEqual([e.uri for e in self.prefetcher.get_upcoming(2)],
+                         [uri(4), uri(0)])
+        # the current track is already resolved
+        self.player.loop_state = LoopState.REPEAT_TRACK
+        self.assertEqual(self.prefetcher.get_upcoming(2), [])
+
+    def test_shuffle(self):
+        self.player.shuffle = True
+        playlist = self.player.playlist
+        upcoming = self.prefetcher.get_upcoming(3)
+        self.assertEqual(len(upcoming), 3)
+        # the same tracks play_next will pick
+        for entry in upcoming:
+            self.assertTrue(playlist.shuffle_next())
+            self.assertIs(playlist.current_track, entry)
+
+    def test_merge_search(self):
+        self.player.settings.merge_search = True
+        self.player.media.search_playlist.extend(
+            [track(3), track(10), track(11)])
+        self.player.playlist.set_position(3)
+        # results already in the playlist are skipped
+        self.assertEqual([e.uri for e in self.prefetcher.get_upcoming(3)],
+                         [uri(4), uri(10), uri(11)])
+
+
+class TestPrefetch(PrefetcherTestCase):
+    def test_prefetch_upcoming(self):
+        self.player.playlist.set_position(1)
+        self.prefetcher.prefetch_upcoming()
+        self.release.set()
+        self.assertEqual(self.wait_resolved(2), [uri(2), uri(3)])
+
+    def test_group_cancel(self):
+        self.block()
+        entries = self.player.tracks
+        self.prefetcher.prefetch(entries[:2], "upcoming")
+        # the queue changed, the first batch is not worth resolving
+        self.prefetcher.prefetch(entries[2:3], "upcoming")
+        self.prefetcher.prefetch(entries[4:], "other")
+        self.release.set()
+        self.assertEqual(self.wait_resolved(3), [uri(2), uri(4)])
+
+    def test_cancel(self):
+        self.block()
+        self.prefetcher.prefetch(self.player.tracks, "upcoming")
+        self.prefetcher.cancel("upcoming")
+        self.release.set()
+        self.assertEqual(self.wait_resolved(1), [])
+
+    def test_no_cache(self):
+        self.player.stream_cache = None
+        self.prefetcher.prefetch(self.player.tracks, "upcoming")
+        self.release.set()
+        self.assertEqual(self.wait_resolved(1, timeout=0.2), [])
+
+    def test_wait(self):
+        self.block()
+        # still being resolved
+        self.assertFalse(self.prefetcher.wait(uri("busy"), timeout=0.05))
+        # not being prefetched, nothing to wait for
+        self.assertTrue(self.prefetcher.wait(uri(0), timeout=0.05))
+        self.assertTrue(self.prefetcher.wait(uri("busy"), video=True,
+                                             timeout=0.05))
+        self.release.set()
+        self.assertTrue(self.prefetcher.wait(uri("busy"), timeout=1))
+        self.assertIn(uri("busy"), self.resolved)
+
+
+class TestPrefetchResults(PrefetcherTestCase):
+    def setUp(self):
+        super().setUp()
+        self.player.media.search_playlist.extend(
+            [track(i) for i in range(10, 15)])
+
+    def test_prefetch_results(self):
+        self.prefetcher.prefetch_results()
+        self.release.set()
+        # only the best prefetch_search_results
+        self.assertEqual(self.wait_resolved(2), [uri(10), uri(11)])
+
+    def test_priority(self):
+        self.block()
+        self.prefetcher.prefetch_results()
+        self.prefetcher.prefetch_upcoming()
+        self.release.set()
+        # the upcoming tracks go first even if queued later
+        self.assertEqual(self.wait_resolved(5),
+                         [uri(1), uri(2), uri(10), uri(11)])
+
+    def test_new_search(self):
+        self.block()
+        self.prefetcher.prefetch_upcoming()
+        self.prefetcher.prefetch_results()
+        # new search started, old results are dropped
+        self.prefetcher.cancel("search")
+        self.release.set()
+        self.assertEqual(self.wait_resolved(3), [uri(1), uri(2)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,348 @@
+import tempfile
+import unittest
+from os.path import join
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from json_database import JsonStorage
+
+from ovos_plugin_common_play.ocp.search import OCPSearch, SearchSession
+from ovos_plugin_common_play.ocp.settings import OCPSettings
+from ovos_plugin_common_play.ocp.status import MediaType
+from ovos_utils.messagebus import FakeBus, Message
+
+
+def fresh_storage(name, subfolder=None):
+    # learned stats never leak between tests or into the user folder
+    return JsonStorage(join(tempfile.mkdtemp(), f"{name}.json"))
+
+
+def setUpModule():
+    global _storage_patch
+    _storage_patch = patch(
+        "ovos_plugin_common_play.ocp.stats.JsonStorageXDG", fresh_storage)
+    _storage_patch.start()
+
+
+def tearDownModule():
+    _storage_patch.stop()
+
+
+def get_player(**settings):
+    config = OCPSettings()
+    config["query_cache"] = False
+    config["backwards_compatibility"] = False
+    for k, v in settings.items():
+        config[k] = v
+    bus = FakeBus()
+    return SimpleNamespace(settings=config, bus=bus, gui=MagicMock(),
+                           prefetcher=MagicMock(),
+                           add_event=bus.on,
+                           remove_event=bus.remove_all_listeners)
+
+
+class TestOCPSearchInit(unittest.TestCase):
+    def test_bind_on_init(self):
+        player = get_player(query_cache=True,
+                            adaptive_timeout_min_samples=3)
+        search = OCPSearch(player)
+        self.assertIs(search.player, player)
+        self.assertIsNotNone(search.query_cache)
+        self.assertEqual(search.capabilities.min_samples, 3)
+
+    def test_bind_later(self):
+        search = OCPSearch()
+        self.assertIsNone(search.player)
+        search.bind(get_player())
+        self.assertIsNone(search.query_cache)
+
+    def test_cancel_prefetch(self):
+        search = OCPSearch(get_player(query_cache=True))
+        search.query_cache.cache_results("song", [
+            {"skill_id": "skill.a", "results": [result("a", 50)]}])
+        search.search("song")
+        # results of the previous search are not resolved anymore
+        search.player.prefetcher.cancel.assert_called_once_with("search")
+
+
+def result(name, conf, skill_id="skill.a", **kwargs):
+    return dict({"uri": f"https://example.com/{name}.mp3",
+                 "title": name, "match_confidence": conf,
+                 "skill_id": skill_id}, **kwargs)
+
+
+class TestResultMerge(unittest.TestCase):
+    def test_promote_from_overflow(self):
+        search = OCPSearch(get_player(search_max_results=2))
+        search.set_results([result("x1", 50), result("x2", 50),
+                            result("low", 10),
+                            result("low", 95, skill_id="skill.b")])
+        playlist = search.search_playlist
+        self.assertEqual([e.title for e in playlist], ["low", "x2"])
+        self.assertEqual(playlist[0].match_confidence, 95)
+        self.assertEqual(playlist[0].data["skills"], ["skill.a", "skill.b"])
+        # the evicted result can still be loaded
+        self.assertTrue(search.has_more)
+        self.assertEqual(search.load_more(), 1)
+        self.assertEqual(len(playlist), 3)
+
+    def test_bump_top_result(self):
+        search = OCPSearch(get_player(search_max_results=2))
+        search.set_results([result("a", 40), result("b", 60),
+                            result("a", 70, skill_id="skill.b"),
+                            result("c", 50)])
+        # a is no longer the worst kept result, c goes to the overflow
+        self.assertEqual([e.title for e in search.search_playlist],
+                         ["a", "b"])
+        self.assertEqual(search.search_playlist[0].match_confidence, 70)
+        self.assertEqual(search.load_more(), 1)
+        self.assertEqual(search.search_playlist[2].title, "c")
+
+    def test_bump_below_top(self):
+        search = OCPSearch(get_player(search_max_results=2))
+        search.set_results([result("x1", 50), result("x2", 60),
+                            result("low", 10),
+                            result("low", 20, skill_id="skill.b")])
+        self.assertEqual([e.title for e in search.search_playlist],
+                         ["x2", "x1"])
+        self.assertEqual(search.duplicates, 1)
+
+
+class TestDedup(unittest.TestCase):
+    def test_normalize_uri(self):
+        normalize = OCPSearch._normalize_uri
+        self.assertEqual(
+            normalize("youtube//https://www.youtube.com/watch?v=xxx#t=1"),
+            "https://youtube.com/watch?v=xxx")
+        self.assertEqual(normalize("ydl//https://WWW.Example.com/a/"),
+                         "https://example.com/a")
+        self.assertEqual(normalize(" https://example.com/a.mp3 "),
+                         "https://example.com/a.mp3")
+        # the query is part of the identity
+        self.assertNotEqual(normalize("https://example.com/?id=1"),
+                            normalize("https://example.com/?id=2"))
+        self.assertEqual(normalize("/home/music/a.mp3"), "/home/music/a.mp3")
+
+    def test_dedup_keys(self):
+        keys = OCPSearch._get_dedup_keys({
+            "uri": "youtube//https://youtube.com/watch?v=1",
+            "title": "Yellow  Submarine", "artist": "The Beatles"})
+        self.assertEqual(keys, ["https://youtube.com/watch?v=1",
+                                ("yellow submarine", "the beatles")])
+        # title alone is not enough to match
+        self.assertEqual(OCPSearch._get_dedup_keys({"title": "song"}), [])
+
+    def test_dedup_results(self):
+        results = [
+            result("a", 50),
+            {"uri": "https://www.example.com/a.mp3#x", "title": "a",
+             "match_confidence": 80, "skill_id": "skill.b"},
+            result("b", 70, artist="someone"),
+            {"uri": "bandcamp//https://x.bandcamp.com/b", "title": "B",
+             "artist": "Someone", "match_confidence": 60,
+             "skill_id": "skill.c"},
+            result("c", 30)
+        ]
+        deduped = OCPSearch.dedup_results(results)
+        self.assertEqual([r["title"] for r in deduped], ["a", "b", "c"])
+        self.assertEqual(deduped[0]["match_confidence"], 80)
+        self.assertEqual(deduped[0]["skills"], ["skill.a", "skill.b"])
+        self.assertEqual(deduped[1]["match_confidence"], 70)
+        self.assertEqual(deduped[1]["skills"], ["skill.a", "skill.c"])
+        self.assertNotIn("skills", deduped[2])
+
+    def test_same_skill_twice(self):
+        deduped = OCPSearch.dedup_results([result("a", 50), result("a", 40)])
+        self.assertEqual(deduped[0]["skills"], ["skill.a"])
+        self.assertEqual(deduped[0]["match_confidence"], 50)
+
+    def test_search_playlist(self):
+        search = OCPSearch(get_player())
+        search.set_results([result("a", 50),
+                            result("a", 80, skill_id="skill.b",
+                                   uri="https://www.example.com/a.mp3/"),
+                            result("b", 60)])
+        self.assertEqual(search.duplicates, 1)
+        self.assertEqual([(e.title, e.match_confidence)
+                          for e in search.search_playlist],
+                         [("a", 80), ("b", 60)])
+
+
+class TestTopResults(unittest.TestCase):
+    def setUp(self):
+        self.search = OCPSearch(get_player(search_max_results=3,
+                                           search_max_overflow=4))
+
+    def test_eviction(self):
+        self.search.set_results([result(f"r{c}", c)
+                                 for c in [10, 50, 30, 70, 20, 90]])
+        # best ones are shown, the others wait in the overflow
+        self.assertEqual([e.match_confidence
+                          for e in self.search.search_playlist],
+                         [90, 70, 50])
+        self.assertTrue(self.search.has_more)
+        self.assertEqual(len(self.search._overflow), 3)
+
+    def test_load_more(self):
+        self.search.set_results([result(f"r{c}", c)
+                                 for c in [10, 50, 30, 70, 20, 90]])
+        self.assertEqual(self.search.load_more(2), 2)
+        self.assertEqual([e.match_confidence
+                          for e in self.search.search_playlist],
+                         [90, 70, 50, 30, 20])
+        self.assertEqual(self.search.load_more(), 1)
+        self.assertEqual(self.search.search_playlist[-1].match_confidence,
+                         10)
+        self.assertFalse(self.search.has_more)
+        self.assertEqual(self.search.load_more(), 0)
+
+    def test_overflow_trim(self):
+        self.search.set_results([result(f"r{c}", c) for c in range(20)])
+        self.assertLessEqual(len(self.search._overflow), 8)
+        self.search.load_more(20)
+        # the worst results were dropped
+        confs = [e.match_confidence for e in self.search.search_playlist]
+        self.assertEqual(confs[:7], [19, 18, 17, 16, 15, 14, 13])
+        self.assertNotIn(0, confs)
+
+    def test_clear(self):
+        self.search.set_results([result(f"r{c}", c) for c in range(10)])
+        self.search.set_results([result("new", 10)])
+        self.assertEqual(len(self.search.search_playlist), 1)
+        self.assertFalse(self.search.has_more)
+
+    def test_more_request(self):
+        self.search.set_results([result(f"r{c}", c) for c in range(7)])
+        replies = []
+        bus = self.search.bus
+        bus.on("ovos.common_play.search.more.response",
+               lambda m: replies.append(m.data))
+        bus.emit(Message("ovos.common_play.search.more", {"count": 2}))
+        self.assertEqual(replies[-1], {"loaded": 2, "remaining": 2})
+        # defaults to a page of search_max_results
+        bus.emit(Message("ovos.common_play.search.more"))
+        self.assertEqual(replies[-1], {"loaded": 2, "remaining": 0})
+        self.assertEqual(len(self.search.search_playlist), 7)
+
+
+class TestSearchSessions(unittest.TestCase):
+    def setUp(self):
+        self.search = OCPSearch(get_player())
+        self.bus = self.search.bus
+
+    def reply(self, phrase, results, search_id=None, skill_id="skill.a"):
+        data = {"phrase": phrase, "skill_id": skill_id,
+                "searching": False, "results": results}
+        if search_id:
+            data["search_id"] = search_id
+        self.bus.emit(Message("ovos.common_play.query.response", data))
+
+    def start(self, phrase, background=False):
+        session = SearchSession(phrase, background=background)
+        self.search._add_session(session)
+        return session
+
+    def test_route_by_search_id(self):
+        first = self.start("song")
+        second = self.start("song")
+        self.reply("song", [result("a", 50)], first.search_id)
+        self.assertEqual(len(first.replies), 1)
+        self.assertEqual(second.replies, [])
+        # unknown ids are ignored
+        self.reply("song", [result("b", 50)], "expired")
+        self.assertEqual(len(first.replies) + len(second.replies), 1)
+
+    def test_phrase_fallback(self):
+        first = self.start("song a")
+        second = self.start("song b")
+        self.reply("song a", [result("a", 50)])
+        self.assertEqual(len(first.replies), 1)
+        self.assertEqual(second.replies, [])
+        # newest session wins if the phrase is repeated
+        third = self.start("song a")
+        self.reply("song a", [result("b", 50)])
+        self.assertEqual(len(first.replies), 1)
+        self.assertEqual(len(third.replies), 1)
+
+    def test_late_reply(self):
+        old = self.start("old song")
+        old.finish()
+        current = self.start("new song")
+        self.reply("new song", [result("new", 50)], current.search_id)
+        self.reply("old song", [result("old", 90)], old.search_id)
+        # recorded for stats, but the shown results are not touched
+        self.assertEqual(len(old.replies), 1)
+        self.assertIn("skill.a", old.answered_skills)
+        self.assertEqual([e.title for e in self.search.search_playlist],
+                         ["new"])
+
+    def test_background_session(self):
+        current = self.start("song")
+        refresh = self.start("other song", background=True)
+        self.assertTrue(self.search._is_current(current))
+        self.reply("other song", [result("a", 50)], refresh.search_id)
+        self.assertEqual(len(refresh.replies), 1)
+        self.assertEqual(len(self.search.search_playlist), 0)
+
+    def test_eviction(self):
+        self.search.max_finished_sessions = 2
+        sessions = [self.start(f"song {i}") for i in range(4)]
+        for session in sessions:
+            session.expected_skills.add("skill.slow")
+            session.finish()
+        searching = self.start("song 4")
+        ids = list(self.search._sessions)
+        # the newest finished sessions are kept, searching ones always
+        self.assertEqual(ids, [s.search_id for s in sessions[2:]] +
+                         [searching.search_id])
+        # skills that never answered the dropped sessions missed them
+        self.assertEqual(self.search.stats.queries("skill.slow",
+                                                   sessions[0].media_type),
+                         2)
+
+
+class TestAdaptiveTimeout(unittest.TestCase):
+    def get_search(self, **settings):
+        settings = dict({"min_timeout": 1, "max_timeout": 5,
+                         "adaptive_timeout_min_samples": 3}, **settings)
+        return OCPSearch(get_player(**settings))
+
+    @staticmethod
+    def record(search, latency, n=3, skill_id="skill.a"):
+        for _ in range(n):
+            search.stats.record(skill_id, MediaType.MUSIC, latency, hit=True)
+
+    def test_no_samples(self):
+        search = self.get_search()
+        self.assertEqual(search.get_timeout(MediaType.MUSIC), 5)
+        # generic queries wait longer, every skill needs to search
+        self.assertEqual(search.get_timeout(MediaType.GENERIC), 8)
+
+    def test_min_samples(self):
+        search = self.get_search()
+        self.record(search, 2.0, n=2)
+        self.assertEqual(search.get_timeout(MediaType.MUSIC), 5)
+        self.record(search, 2.0, n=1)
+        self.assertEqual(search.get_timeout(MediaType.MUSIC), 2.0)
+
+    def test_clamp(self):
+        search = self.get_search()
+        self.record(search, 0.2)
+        self.assertEqual(search.get_timeout(MediaType.MUSIC), 1)
+        self.record(search, 30, n=10, skill_id="skill.slow")
+        self.assertEqual(search.get_timeout(MediaType.MUSIC), 5)
+
+    def test_slowest_skill(self):
+        search = self.get_search()
+        self.record(search, 1.5)
+        self.record(search, 2.5, skill_id="skill.b")
+        self.assertEqual(search.get_timeout(MediaType.MUSIC), 2.5)
+
+    def test_disabled(self):
+        search = self.get_search(adaptive_timeout=False)
+        self.record(search, 2.0)
+        self.assertEqual(search.get_timeout(MediaType.MUSIC), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+import unittest
+
+from ovos_plugin_common_play.ocp.shuffle import ShuffleOrder
+
+
+class TestShuffleOrder(unittest.TestCase):
+    def test_full_cycle(self):
+        order = ShuffleOrder(50)
+        order.start(7)
+        played = [7]
+        while True:
+            position = order.next()
+            if position is None:
+                break
+            played.append(position)
+        # every position exactly once, starting from the current one
+        self.assertEqual(played[0], 7)
+        self.assertEqual(sorted(played), list(range(50)))
+        self.assertEqual(order.history, played)
+
+    def test_prev_next_walk_history(self):
+        order = ShuffleOrder(20)
+        order.start(0)
+        played = [0] + [order.next() for _ in range(5)]
+        # going back returns the same positions in reverse
+        back = [order.prev() for _ in range(5)]
+        self.assertEqual(back, played[-2::-1])
+        self.assertIsNone(order.prev())
+        # and forward again repeats them, no new draws
+        self.assertEqual([order.next() for _ in range(5)], played[1:])
+
+    def test_upcoming(self):
+        order = ShuffleOrder(10)
+        order.start(3)
+        upcoming = order.upcoming(4)
+        self.assertEqual(len(upcoming), 4)
+        self.assertNotIn(3, upcoming)
+        # peeking does not move the cursor
+        self.assertEqual([order.next() for _ in range(4)], upcoming)
+        self.assertEqual(len(order.upcoming(100)), 5)
+
+    def test_empty(self):
+        order = ShuffleOrder(0)
+        order.start(0)
+        self.assertIsNone(order.next())
+        self.assertIsNone(order.prev())
+        self.assertEqual(order.upcoming(3), [])
+
+    def test_insert(self):
+        order = ShuffleOrder(10)
+        order.start(5)
+        played = [5, order.next(), order.next()]
+        order.insert(0)
+        # played positions shift, the new one is still to be played
+        shifted = [p + 1 for p in played]
+        self.assertEqual(order.history, shifted)
+        self.assertEqual(order.prev(), shifted[1])
+        order.next()
+        rest = []
+        while True:
+            position = order.next()
+            if position is None:
+                break
+            rest.append(position)
+        self.assertEqual(sorted(shifted + rest), list(range(11)))
+
+    def test_append(self):
+        order = ShuffleOrder(3)
+        order.start(0)
+        order.insert(3)
+        self.assertEqual(order.n, 4)
+        self.assertEqual(sorted([0] + [order.next() for _ in range(3)]),
+                         [0, 1, 2, 3])
+        self.assertIsNone(order.next())
+
+    def test_remove(self):
+        order = ShuffleOrder(10)
+        order.start(2)
+        played = [2, order.next(), order.next(), order.next()]
+        # remove a played position before the cursor
+        removed = played[1]
+        order.remove(removed)
+        expected = [p - 1 if p > removed else p
+                    for p in played if p != removed]
+        self.assertEqual(order.history, expected)
+        # the cursor still points to the same track
+        self.assertEqual(order.prev(), expected[1])
+        order.next()
+        rest = []
+        while True:
+            position = order.next()
+            if position is None:
+                break
+            rest.append(position)
+        self.assertEqual(sorted(expected + rest), list(range(9)))
+
+    def test_remove_unplayed(self):
+        order = ShuffleOrder(5)
+        order.start(0)
+        order.remove(4)
+        self.assertEqual(order.history, [0])
+        self.assertEqual(sorted([0] + [order.next() for _ in range(3)]),
+                         [0, 1, 2, 3])
+        self.assertIsNone(order.next())
+
+
+if __name__ == '__main__':
+    unittest.main()
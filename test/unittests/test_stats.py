@@ -0,0 +1,79 @@
+import tempfile
+import unittest
+from os.path import join
+from unittest.mock import patch
+
+from json_database import JsonStorage
+
+from ovos_plugin_common_play.ocp.stats import SkillSearchStats
+from ovos_plugin_common_play.ocp.status import MediaType
+
+
+class TestSkillSearchStats(unittest.TestCase):
+    def setUp(self):
+        folder = tempfile.mkdtemp()
+
+        def storage(name, subfolder=None):
+            return JsonStorage(join(folder, f"{name}.json"))
+
+        patcher = patch("ovos_plugin_common_play.ocp.stats.JsonStorageXDG",
+                        storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.stats = SkillSearchStats(max_samples=20)
+
+    def test_record(self):
+        self.stats.record("skill.a", MediaType.MUSIC, 0.5, hit=True)
+        self.stats.record("skill.a", MediaType.MUSIC, 1.5, hit=False)
+        self.assertEqual(self.stats.queries("skill.a", MediaType.MUSIC), 2)
+        self.assertEqual(self.stats.hit_rate("skill.a", MediaType.MUSIC),
+                         0.5)
+        # stats are kept per media type
+        self.assertEqual(self.stats.queries("skill.a", MediaType.MOVIE), 0)
+        self.assertIsNone(self.stats.latency("skill.a", MediaType.MOVIE))
+
+    def test_record_miss(self):
+        self.stats.record("skill.a", MediaType.MUSIC, 0.5, hit=True)
+        self.stats.record_miss("skill.a", MediaType.MUSIC)
+        self.assertEqual(self.stats.queries("skill.a", MediaType.MUSIC), 2)
+        self.assertEqual(self.stats.hit_rate("skill.a", MediaType.MUSIC),
+                         0.5)
+        # misses have no latency sample
+        self.assertEqual(self.stats.latency("skill.a", MediaType.MUSIC), 0.5)
+
+    def test_latency_percentile(self):
+        for i in range(1, 21):
+            self.stats.record("skill.a", MediaType.MUSIC, i / 10, hit=True)
+        self.assertEqual(self.stats.latency("skill.a", MediaType.MUSIC), 1.9)
+        self.assertEqual(self.stats.latency("skill.a", MediaType.MUSIC,
+                                            percentile=50), 1.1)
+        # only the last max_samples are kept
+        for _ in range(20):
+            self.stats.record("skill.a", MediaType.MUSIC, 0.1, hit=True)
+        self.assertEqual(self.stats.latency("skill.a", MediaType.MUSIC), 0.1)
+
+    def test_get_timeout(self):
+        for _ in range(5):
+            self.stats.record("skill.fast", MediaType.MUSIC, 0.5, hit=True)
+            self.stats.record("skill.slow", MediaType.MUSIC, 2.0, hit=True)
+            # slow and never matches, not waited for
+            self.stats.record("skill.useless", MediaType.MUSIC, 9, hit=False)
+        self.assertEqual(self.stats.get_timeout(MediaType.MUSIC), 2.0)
+        self.assertIsNone(self.stats.get_timeout(MediaType.MOVIE))
+
+    def test_min_samples(self):
+        for _ in range(4):
+            self.stats.record("skill.a", MediaType.MUSIC, 0.5, hit=True)
+        self.assertIsNone(self.stats.get_timeout(MediaType.MUSIC))
+        self.assertEqual(self.stats.get_timeout(MediaType.MUSIC,
+                                                min_samples=4), 0.5)
+
+    def test_store(self):
+        self.stats.record("skill.a", MediaType.MUSIC, 0.5, hit=True)
+        self.stats.store()
+        loaded = SkillSearchStats()
+        self.assertEqual(loaded.queries("skill.a", MediaType.MUSIC), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from types import SimpleNamespace
+
+from ovos_plugin_common_play.ocp.stream_handlers.youtube import YdlPool, \
+    YdlBackend
+
+
+class FakeYoutubeDL:
+    def __init__(self, opts):
+        self.opts = opts
+        self.closed = False
+
+    def __exit__(self, *args):
+        self.closed = True
+
+
+youtube_dl = SimpleNamespace(YoutubeDL=FakeYoutubeDL)
+
+
+class TestYdlPool(unittest.TestCase):
+    def setUp(self):
+        self.pool = YdlPool(max_idle=1)
+        self.addCleanup(self.pool.clear)
+
+    def get(self, opts=None):
+        return self.pool.get(youtube_dl, YdlBackend.YDLP,
+                             opts or {"quiet": True})
+
+    def test_reuse(self):
+        with self.get() as first:
+            pass
+        with self.get() as second:
+            pass
+        self.assertIs(first, second)
+        self.assertFalse(first.closed)
+        # other options get their own instance
+        with self.get({"quiet": False}) as other:
+            self.assertIsNot(other, first)
+
+    def test_concurrent(self):
+        with self.get() as first:
+            with self.get() as second:
+                self.assertIsNot(first, second)
+        # only max_idle instances are kept, the others are closed
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
+
+    def test_discard_on_error(self):
+        with self.assertRaises(ValueError):
+            with self.get() as failed:
+                raise ValueError("extraction failed")
+        self.assertTrue(failed.closed)
+        with self.get() as ydl:
+            self.assertIsNot(ydl, failed)
+
+    def test_clear(self):
+        with self.get() as ydl:
+            pass
+        self.pool.clear()
+        self.assertTrue(ydl.closed)
+        with self.get() as new:
+            self.assertIsNot(new, ydl)
+
+
+if __name__ == '__main__':
+    unittest.main()